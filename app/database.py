@@ -1,20 +1,83 @@
 import os
-from sqlalchemy import create_engine
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.db_base import Base
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'scheduler.db')}"
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'scheduler.db')}"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL
+
+# Пул: публичная страница читает параллельно, пишет (публикация, генерация) — по одному
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Профиль SQLite. WAL: читатели не ждут пишущего, коммит не блокирует страницу графика.
+# synchronous=NORMAL в WAL безопасен для целостности (теряется максимум последний коммит при сбое питания).
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))),  # ждать писателя, а не падать "database is locked"
+    ("cache_size", -int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))),  # отрицательное — в КБ
+    ("mmap_size", int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))),
+    ("temp_store", "MEMORY"),
 )
 
+
+def _is_sqlite_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def make_engine(url: Optional[str] = None, **kwargs) -> Engine:
+    """
+    Движок с настроенным пулом; для файловой SQLite — прагмы SQLITE_PRAGMAS
+    на каждом новом соединении. kwargs перекрывают параметры create_engine.
+    """
+    url = make_url(url or SQLALCHEMY_DATABASE_URL)
+    params = {}
+
+    if url.get_backend_name() == "sqlite":
+        params["connect_args"] = {"check_same_thread": False}
+        if _is_sqlite_memory(url):
+            # одна база на процесс: все сессии должны видеть одно соединение
+            params["poolclass"] = StaticPool
+        else:
+            params.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+    else:
+        params.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT,
+                      pool_pre_ping=True)
+    params.update(kwargs)
+
+    engine = create_engine(url, **params)
+
+    if url.get_backend_name() == "sqlite" and not _is_sqlite_memory(url):
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_conn, _record):
+            cur = dbapi_conn.cursor()
+            for name, value in SQLITE_PRAGMAS:
+                cur.execute(f"PRAGMA {name}={value}")
+            cur.close()
+
+    return engine
+
+
+engine = make_engine()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def init_db():
     from app import models
+    from app.schedule_cache import ensure_schedule_version
     Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        ensure_schedule_version(db)
+    finally:
+        db.close()
     
     
 
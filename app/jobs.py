@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal
+from app.models import GenerationJob, GenerationLock
+from app.scheduler.generator import generate_schedule, generate_streaming
+
+logger = logging.getLogger("scheduler.jobs")
+
+# Генерация идёт в фоне, чтобы не держать HTTP-запрос и event loop.
+# Один воркер: прогоны и так пишут в одно окно черновиков.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="generation")
+
+# Single-flight: одинаковые (start, weeks, опции), пока задача не завершена, сливаются в неё
+_inflight: Dict[Tuple[date, int, str], str] = {}
+_inflight_lock = threading.Lock()
+
+# Блокировка окна в БД сериализует генерацию между воркерами uvicorn
+LOCK_WAIT_SECONDS = 600
+LOCK_POLL_SECONDS = 0.5
+LOCK_STALE_AFTER = timedelta(minutes=30)  # владелец, скорее всего, умер вместе с процессом
+# Незавершённая задача старше этого уже не считается идущей, даже если pid жив
+# (pid мог достаться другому процессу после рестарта контейнера)
+JOB_STALE_AFTER = LOCK_STALE_AFTER
+
+ACTIVE_STATUSES = (GenerationJob.STATUS_QUEUED, GenerationJob.STATUS_RUNNING)
+
+
+def _update(job_id: str, **fields) -> None:
+    db = SessionLocal()
+    try:
+        db.query(GenerationJob).filter(GenerationJob.id == job_id).update(fields, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _try_lock(job_id: str, start: date, weeks: int) -> bool:
+    """Один INSERT строк-дней окна; занятый день даёт IntegrityError и откат целиком."""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.query(GenerationLock).filter(GenerationLock.acquired_at < now - LOCK_STALE_AFTER).delete(
+            synchronize_session=False)
+        db.execute(insert(GenerationLock), [
+            {"day": start + timedelta(days=i), "owner": job_id, "acquired_at": now}
+            for i in range(weeks * 7)
+        ])
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def acquire_window_lock(job_id: str, start: date, weeks: int, timeout: float = LOCK_WAIT_SECONDS) -> bool:
+    deadline = time.monotonic() + timeout
+    while not _try_lock(job_id, start, weeks):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(LOCK_POLL_SECONDS)
+    return True
+
+
+def release_window_lock(job_id: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(GenerationLock).filter(GenerationLock.owner == job_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _options_key(options: dict) -> str:
+    """
+    Канонический JSON опций: задачи с разными опциями — разные задачи.
+    None и False — значения по умолчанию, в ключ не входят.
+    """
+    return json.dumps({k: v for k, v in options.items() if v is not None and v is not False},
+                      sort_keys=True, default=str)
+
+
+def _finished_twin(job_id: str, start: date, weeks: int, options_key: str) -> Optional[GenerationJob]:
+    """
+    Такая же задача из другого процесса, завершившаяся, пока эта ждала блокировку:
+    её результат и есть наш, второй прогон не нужен.
+    """
+    db = SessionLocal()
+    try:
+        created_at = db.query(GenerationJob.created_at).filter(GenerationJob.id == job_id).scalar()
+        return db.query(GenerationJob).filter(
+            GenerationJob.id != job_id,
+            GenerationJob.start == start,
+            GenerationJob.weeks == weeks,
+            GenerationJob.options == options_key,
+            GenerationJob.status == GenerationJob.STATUS_DONE,
+            GenerationJob.finished_at >= created_at,
+        ).order_by(GenerationJob.finished_at.desc()).first()
+    finally:
+        db.close()
+
+
+def _generate(job_id: str, start: date, weeks: int, options: dict) -> dict:
+    options = dict(options)
+    if options.pop("stream", False):
+        # по неделе с коммитом: уже готовые недели видны, пока идут следующие
+        filled = 0
+        solution = None
+        for n, solution in enumerate(generate_streaming(start, weeks, **options), 1):
+            filled += solution.filled()
+            _update(job_id, progress=f"week {n}/{weeks}")
+        return {
+            "start": start.isoformat(),
+            "end": (start + timedelta(weeks=weeks, days=-1)).isoformat(),
+            "filled_cells": filled,
+            "seed": options.get("seed"),
+            "stats": solution.stats.as_dict() if solution is not None and solution.stats else None,
+        }
+
+    solution, dates = generate_schedule(
+        start, weeks=weeks, persist=True,
+        progress=lambda phase: _update(job_id, progress=phase),
+        **options,
+    )
+    return {
+        "start": dates[0].isoformat(),
+        "end": dates[-1].isoformat(),
+        "filled_cells": solution.filled(),
+        "seed": solution.seed,
+        "stats": solution.stats.as_dict() if solution.stats else None,
+    }
+
+
+def _run(job_id: str, start: date, weeks: int, options: dict) -> None:
+    key = (start, weeks, _options_key(options))
+    try:
+        _update(job_id, progress="waiting_lock")
+        if not acquire_window_lock(job_id, start, weeks):
+            raise TimeoutError(f"window {start.isoformat()} (+{weeks}w) is locked by another generation")
+        try:
+            twin = _finished_twin(job_id, start, weeks, key[2])
+            if twin is not None:
+                logger.info("Generation job %s coalesced into %s", job_id, twin.id)
+                _update(job_id, status=GenerationJob.STATUS_DONE, progress="done", result=twin.result,
+                        started_at=datetime.utcnow(), finished_at=datetime.utcnow())
+                return
+            _update(job_id, status=GenerationJob.STATUS_RUNNING, started_at=datetime.utcnow())
+            result = _generate(job_id, start, weeks, options)
+        finally:
+            release_window_lock(job_id)
+        _update(job_id, status=GenerationJob.STATUS_DONE, progress="done",
+                result=json.dumps(result, ensure_ascii=False), finished_at=datetime.utcnow())
+    except Exception as e:
+        logger.exception("Generation job %s FAILED", job_id)
+        _update(job_id, status=GenerationJob.STATUS_FAILED, error=f"{type(e).__name__}: {e}",
+                finished_at=datetime.utcnow())
+    finally:
+        with _inflight_lock:
+            if _inflight.get(key) == job_id:
+                del _inflight[key]
+
+
+def _active_job_id(start: date, weeks: int, options_key: str) -> Optional[str]:
+    """Незавершённая свежая задача с тем же ключом — в т.ч. поставленная другим воркером."""
+    db = SessionLocal()
+    try:
+        return db.query(GenerationJob.id).filter(
+            GenerationJob.start == start,
+            GenerationJob.weeks == weeks,
+            GenerationJob.options == options_key,
+            GenerationJob.status.in_(ACTIVE_STATUSES),
+            GenerationJob.created_at >= datetime.utcnow() - JOB_STALE_AFTER,
+        ).order_by(GenerationJob.created_at).limit(1).scalar()
+    finally:
+        db.close()
+
+
+def submit_generation(start: date, weeks: int = 2, **options) -> str:
+    """
+    Ставит генерацию в очередь и сразу возвращает id задачи.
+    Если такая же (start, weeks, опции) уже в очереди или идёт — возвращает её id,
+    второй прогон не запускается.
+    """
+    key = (start, weeks, _options_key(options))
+    with _inflight_lock:
+        job_id = _inflight.get(key) or _active_job_id(*key)
+        if job_id is not None:
+            logger.info("Generation job %s reused: start=%s weeks=%s", job_id, start.isoformat(), weeks)
+            return job_id
+
+        job_id = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            db.add(GenerationJob(
+                id=job_id, start=start, weeks=weeks, options=key[2],
+                status=GenerationJob.STATUS_QUEUED, progress="queued",
+                worker_pid=os.getpid(), created_at=datetime.utcnow(),
+            ))
+            db.commit()
+        finally:
+            db.close()
+        _inflight[key] = job_id
+    _executor.submit(_run, job_id, start, weeks, options)
+    logger.info("Generation job %s queued: start=%s weeks=%s", job_id, start.isoformat(), weeks)
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        job = db.query(GenerationJob).get(job_id)
+        if job is None:
+            return None
+        return {
+            "id": job.id,
+            "start": job.start.isoformat(),
+            "weeks": job.weeks,
+            "options": json.loads(job.options) if job.options else {},
+            "status": job.status,
+            "progress": job.progress,
+            "error": job.error,
+            "result": json.loads(job.result) if job.result else None,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+    finally:
+        db.close()
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def fail_stale_jobs() -> int:
+    """
+    Незавершённые задачи умерших процессов уже никто не доделает: помечаем их
+    упавшими и снимаем их блокировки окна. Задачи живых воркеров не трогаем,
+    если они не старше JOB_STALE_AFTER (живой pid мог достаться другому процессу).
+    """
+    cutoff = datetime.utcnow() - JOB_STALE_AFTER
+    db = SessionLocal()
+    try:
+        stale = [
+            job_id for job_id, pid, created_at in db.query(
+                GenerationJob.id, GenerationJob.worker_pid, GenerationJob.created_at,
+            ).filter(GenerationJob.status.in_(ACTIVE_STATUSES))
+            if pid == os.getpid() or not _pid_alive(pid) or created_at < cutoff
+        ]
+        if stale:
+            db.query(GenerationJob).filter(GenerationJob.id.in_(stale)).update(
+                {"status": GenerationJob.STATUS_FAILED, "error": "interrupted by restart",
+                 "finished_at": datetime.utcnow()}, synchronize_session=False)
+            db.query(GenerationLock).filter(GenerationLock.owner.in_(stale)).delete(synchronize_session=False)
+        db.commit()
+        return len(stale)
+    finally:
+        db.close()
@@ -0,0 +1,168 @@
+"""
+Периодические задачи обслуживания внутри процесса приложения.
+
+Планировщик — один фоновый поток на воркер uvicorn: раз в TICK_SECONDS для каждой
+задачи вычисляется текущий период (period_key), и если маркера (task, period) в
+maintenance_runs ещё нет, задача выполняется. Маркер вставляется в той же
+транзакции, что и работа задачи: успех — ровно один раз на период при любом
+числе воркеров, сбой — откат вместе с маркером и повтор на следующем тике.
+"""
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from zoneinfo import ZoneInfo
+
+from app.database import SessionLocal
+from app.models import MaintenanceRun, Shift
+from app.schedule_cache import bump_schedule_version
+from app.scheduler.history import refresh_week_load
+
+logger = logging.getLogger("scheduler.maintenance")
+
+TICK_SECONDS = 60
+TZ = ZoneInfo("Europe/Berlin")
+# Неделя закрывается в воскресенье в 16:00 по Берлину
+ROLLOVER_WEEKDAY = 6
+ROLLOVER_HOUR = 16
+
+
+@dataclass(frozen=True)
+class PeriodicTask:
+    name: str
+    period_key: Callable[[datetime], Optional[str]]  # None — пока нечего делать
+    run: Callable[[Session, str], None]  # коммит делает планировщик
+
+
+_tasks: List[PeriodicTask] = []
+
+
+def register_task(task: PeriodicTask) -> None:
+    _tasks.append(task)
+
+
+def archive_week_statement(week_start: date, week_end: date):
+    return update(Shift).where(
+        Shift.status == Shift.STATUS_PUBLISHED,
+        Shift.date >= week_start,
+        Shift.date <= week_end,
+    ).values(status="archived").execution_options(synchronize_session=False)
+
+
+def drop_drafts_statement(week_start: date, week_end: date):
+    return delete(Shift).where(
+        Shift.status == Shift.STATUS_DRAFT,
+        Shift.date >= week_start,
+        Shift.date <= week_end,
+    ).execution_options(synchronize_session=False)
+
+
+def weekly_rollover(session: Session, week_start: date) -> int:
+    """
+    Закрытие недели: published -> archived, черновики этой недели удаляются.
+    Коммит — у вызывающего. Возвращает число архивированных смен.
+    """
+    week_end = week_start + timedelta(days=6)
+    updated = session.execute(archive_week_statement(week_start, week_end)).rowcount
+    deleted = session.execute(drop_drafts_statement(week_start, week_end)).rowcount
+
+    if updated:
+        refresh_week_load(session, week_start, week_end)
+    if updated or deleted:
+        bump_schedule_version(session)
+    return updated
+
+
+def rollover_period(now: datetime) -> str:
+    """Понедельник последней недели, чьё закрытие (вс 16:00) уже наступило."""
+    local = now.astimezone(TZ)
+    monday = local.date() - timedelta(days=local.weekday())
+    boundary = datetime.combine(monday + timedelta(days=ROLLOVER_WEEKDAY), datetime.min.time(),
+                                tzinfo=TZ).replace(hour=ROLLOVER_HOUR)
+    if local < boundary:
+        monday -= timedelta(days=7)
+    return monday.isoformat()
+
+
+def _run_rollover(session: Session, period: str) -> None:
+    n = weekly_rollover(session, date.fromisoformat(period))
+    logger.info("weekly_rollover: week=%s archived=%d", period, n)
+
+
+register_task(PeriodicTask("weekly_rollover", rollover_period, _run_rollover))
+
+
+def run_due(now: Optional[datetime] = None) -> int:
+    """Один тик: выполняет задачи, у которых текущий период ещё не отмечен. Возвращает число выполненных."""
+    now = now or datetime.now(TZ)
+    done = 0
+    for task in list(_tasks):
+        period = task.period_key(now)
+        if period is None:
+            continue
+        db = SessionLocal()
+        try:
+            exists = db.query(MaintenanceRun.task).filter(
+                MaintenanceRun.task == task.name, MaintenanceRun.period == period,
+            ).first()
+            if exists:
+                continue
+            db.execute(insert(MaintenanceRun).values(
+                task=task.name, period=period, worker_pid=os.getpid(), ran_at=datetime.utcnow(),
+            ))
+            task.run(db, period)
+            db.commit()
+            done += 1
+        except IntegrityError:
+            # период уже взял другой воркер — молча
+            db.rollback()
+        except OperationalError as e:
+            # БД занята дольше busy_timeout, нет таблицы, схема разошлась — повтор на следующем тике, но не молча
+            db.rollback()
+            logger.warning("maintenance task %s for period %s: database error, will retry: %s",
+                           task.name, period, e.orig if e.orig is not None else e)
+        except Exception:
+            db.rollback()
+            logger.exception("maintenance task %s failed for period %s", task.name, period)
+        finally:
+            db.close()
+    return done
+
+
+class MaintenanceScheduler:
+    def __init__(self, interval: float = TICK_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        # первый тик сразу: догоняем период, пропущенный, пока приложение не работало
+        while True:
+            try:
+                run_due()
+            except Exception:
+                logger.exception("maintenance tick failed")
+            if self._stop.wait(self.interval):
+                return
+
+
+scheduler = MaintenanceScheduler()
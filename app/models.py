@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -49,6 +49,61 @@ class EmployeeSetting(Base):
     )
 
 
+class LocationRule(Base):
+    """Флаги локации для генератора (раньше — множества имён в коде генератора)."""
+    __tablename__ = "location_rules"
+
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"), primary_key=True)
+    weekend_only = Column(Boolean, default=False, nullable=False)    # открыта только в сб/вс
+    special_target = Column(Boolean, default=False, nullable=False)  # «целевая» для need_target_once
+    master_class = Column(Boolean, default=False, nullable=False)    # для need_master_once
+
+
+class EmployeeRule(Base):
+    """Обязательные выходные назначения сотрудника: раз в неделю на целевую локацию / мастер-класс."""
+    __tablename__ = "employee_rules"
+
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    need_target_once = Column(Boolean, default=False, nullable=False)
+    need_master_once = Column(Boolean, default=False, nullable=False)
+
+
+class WeekendBan(Base):
+    """Сотруднику нельзя на эту локацию в выходные."""
+    __tablename__ = "employee_weekend_bans"
+
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"), primary_key=True)
+
+
+class ConflictPair(Base):
+    """Двоих нельзя ставить в одну зону в один день. Хранится один раз, employee_id < other_id."""
+    __tablename__ = "employee_conflicts"
+
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    other_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+
+
+class Unavailability(Base):
+    """Период, когда сотрудник не может работать (отпуск, больничный), включительно по обе даты."""
+    __tablename__ = "employee_unavailability"
+
+    REASON_VACATION = "vacation"
+    REASON_SICK = "sick"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    reason = Column(String(20), nullable=False, default=REASON_VACATION)
+
+    __table_args__ = (
+        # выборка пересечений с окном генерации (load_unavailability): end_date >= start AND start_date <= end —
+        # поиск по диапазону end_date отсекает прошлые периоды, employee_id в индексе — чтение без таблицы
+        Index("ix_unavailability_window", "end_date", "start_date", "employee_id"),
+    )
+
+
 class Shift(Base):
     __tablename__ = "shifts"
 
@@ -71,4 +126,87 @@ class Shift(Base):
             "status",
             name="uix_date_location_status",
         ),
+        # Горячие пути: статус + диапазон дат (график, публикация, rollover, архив)
+        # и смены сотрудника (ORM при удалении сотрудника, история нагрузки)
+        Index("ix_shifts_status_date", "status", "date"),
+        Index("ix_shifts_employee_date", "employee_id", "date"),
+    )
+
+
+class EmployeeWeekLoad(Base):
+    """
+    Материализованная нагрузка: сколько опубликованных/архивных смен у сотрудника
+    в неделе (week_start — понедельник). Пересчитывается по окну при публикации,
+    сохранении, rollover и ремонте графика (app.scheduler.history).
+    """
+    __tablename__ = "employee_week_load"
+
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    shifts = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_employee_week_load_week_start", "week_start"),
     )
+
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    id = Column(String(32), primary_key=True)
+    start = Column(Date, nullable=False)
+    weeks = Column(Integer, nullable=False, default=2)
+    status = Column(String(20), nullable=False, default=STATUS_QUEUED)
+    progress = Column(String(30), nullable=True)  # фаза генерации: load / solve / persist
+    result = Column(Text, nullable=True)          # JSON со сводкой и статистикой прогона
+    error = Column(Text, nullable=True)
+    worker_pid = Column(Integer, nullable=True)   # процесс, который исполняет задачу
+    options = Column(Text, nullable=False, default="{}", server_default="{}")  # JSON опций (solver, stream...)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class GenerationLock(Base):
+    """
+    Межпроцессная блокировка генерации: одна строка на каждый день окна.
+    Пересекающиеся окна конфликтуют по первичному ключу, поэтому захват —
+    это просто INSERT всех дней в одной транзакции.
+    """
+    __tablename__ = "generation_locks"
+
+    day = Column(Date, primary_key=True)
+    owner = Column(String(32), nullable=False)  # id задачи GenerationJob
+    acquired_at = Column(DateTime, nullable=False)
+
+
+class ScheduleVersion(Base):
+    """
+    Счётчик версий графика (одна строка, id=1). Увеличивается в той же транзакции,
+    что и любое изменение смен или видимых в графике имён, — по нему
+    инвалидируется кэш отрендеренной публичной страницы (app.schedule_cache).
+    """
+    __tablename__ = "schedule_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class MaintenanceRun(Base):
+    """
+    Маркер идемпотентности периодических задач (app.maintenance): строка
+    (task, period) вставляется в той же транзакции, что и работа задачи.
+    Второй воркер uvicorn натыкается на первичный ключ и период пропускает.
+    Разовые шаги старта (app.seed_rules) отмечаются так же, с постоянным period.
+    """
+    __tablename__ = "maintenance_runs"
+
+    task = Column(String(64), primary_key=True)
+    period = Column(String(32), primary_key=True)  # например, понедельник архивируемой недели
+    worker_pid = Column(Integer, nullable=True)
+    ran_at = Column(DateTime, nullable=False)
@@ -0,0 +1,110 @@
+"""
+Проверка планов горячих запросов (SQLite, EXPLAIN QUERY PLAN).
+
+    python -m app.query_plan                      # свежая схема в памяти (Base.metadata)
+    python -m app.query_plan --url sqlite:///app/scheduler.db   # схема рабочей БД после миграций
+
+Запросы строятся теми же функциями, что вызывает приложение (*_statement рядом
+с кодом), так что проверяется ровно то, что уходит в базу. Для каждого ожидается
+поиск по своему индексу; полный SCAN таблицы или другой индекс — ошибка, код
+выхода 1. Тот же список проверяет tests/test_query_plans.py на схеме после
+alembic upgrade head.
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, List
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import with_parent
+
+from app.db_base import Base
+from app.maintenance import archive_week_statement, drop_drafts_statement
+from app.models import Employee, Shift
+from app.routes.archive import archived_dates_statement, archived_week_statement
+from app.scheduler.generator import draft_window_statement, unavailability_statement
+from app.scheduler.grid import grid_statement
+from app.scheduler.history import week_load_statement
+from app.scheduler.persist import delete_window_statement
+
+START, END = date(2026, 1, 5), date(2026, 1, 18)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    build: Callable[[], object]
+    index: str
+    table: str = "shifts"
+
+
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery("grid.load_schedule_grid", lambda: grid_statement(START, END), "ix_shifts_status_date"),
+    HotQuery("maintenance.weekly_rollover.archive", lambda: archive_week_statement(START, END),
+             "ix_shifts_status_date"),
+    HotQuery("maintenance.weekly_rollover.drafts", lambda: drop_drafts_statement(START, END),
+             "ix_shifts_status_date"),
+    HotQuery("persist.replace_window", lambda: delete_window_statement(
+        START, END, [Shift.STATUS_PUBLISHED, Shift.STATUS_DRAFT],
+    ), "ix_shifts_status_date"),
+    HotQuery("archive.archive_list", archived_dates_statement, "ix_shifts_status_date"),
+    HotQuery("archive.archive_week", lambda: archived_week_statement(START, END), "ix_shifts_status_date"),
+    HotQuery("generator.balance_schedule", lambda: draft_window_statement(START, END), "ix_shifts_status_date"),
+    HotQuery("history.refresh_week_load", lambda: week_load_statement(START, END), "ix_shifts_status_date"),
+    # ORM при удалении сотрудника подгружает Employee.shifts, чтобы обнулить employee_id, — тот же критерий
+    HotQuery("employees.delete_employee", lambda: select(Shift.id).where(
+        with_parent(Employee(id=1), Employee.shifts),
+    ), "ix_shifts_employee_date"),
+    HotQuery("generator.load_unavailability", lambda: unavailability_statement(START, END),
+             "ix_unavailability_window", table="employee_unavailability"),
+]
+
+
+def explain(engine: Engine, stmt) -> List[str]:
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def table_steps(engine: Engine, q: HotQuery) -> List[str]:
+    """Шаги плана, читающие таблицу запроса."""
+    return [s for s in explain(engine, q.build()) if f" {q.table} " in s]
+
+
+def uses_index(steps: List[str], index: str) -> bool:
+    return any(f"INDEX {index} " in s for s in steps)
+
+
+def check(engine: Engine) -> List[str]:
+    """Список ошибок; пустой — все горячие запросы идут по своим индексам."""
+    errors = []
+    for q in HOT_QUERIES:
+        steps = table_steps(engine, q)
+        if not uses_index(steps, q.index):
+            errors.append(f"{q.name}: expected {q.index}, plan: {steps}")
+    return errors
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="проверить схему существующей БД вместо свежей")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+
+    errors = check(engine)
+    for q in HOT_QUERIES:
+        print(f"{q.name}: {'; '.join(explain(engine, q.build()))}")
+    for e in errors:
+        print("FAIL " + e, file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
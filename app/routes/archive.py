@@ -4,6 +4,7 @@ from collections import defaultdict
 from fastapi import APIRouter, Request, Path
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
@@ -23,11 +24,21 @@ def period_dates(start: date, days: int = 7):
     raw = [d.isoformat() for d in all_days]
     return all_days, pretty, raw
 
+def archived_dates_statement():
+    return select(Shift.date).where(Shift.status == "archived")
+
+def archived_week_statement(first: date, last: date):
+    return select(Shift).where(
+        Shift.status == "archived",
+        Shift.date >= first,
+        Shift.date <= last,
+    )
+
 @router.get("/admin/archive", response_class=HTMLResponse)
 def archive_list(request: Request):
     db: Session = SessionLocal()
     try:
-        rows = db.query(Shift.date).filter(Shift.status == "archived").all()
+        rows = db.execute(archived_dates_statement()).all()
         counter = defaultdict(int)
         for (d,) in rows:
             counter[week_monday(d)] += 1
@@ -47,11 +58,7 @@ def archive_week(request: Request, week_start: str = Path(...)):
         dates, pretty, raw = period_dates(start_date, days=7)
         locations = db.query(Location).order_by(Location.order).all()
         locations_map = {loc.name: loc.id for loc in locations}
-        shifts = db.query(Shift).filter(
-            Shift.status == "archived",
-            Shift.date >= dates[0],
-            Shift.date <= dates[-1],
-        ).all()
+        shifts = db.execute(archived_week_statement(dates[0], dates[-1])).scalars().all()
         idx = {(s.location_id, s.date): (s.employee.full_name if s.employee else "") for s in shifts}
         table = {loc.name: [idx.get((loc.id, d), "") for d in dates] for loc in locations}
         employees = db.query(Employee).order_by(Employee.full_name).all()
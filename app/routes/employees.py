@@ -6,6 +6,8 @@ from typing import Optional, List
 
 from app.database import get_db
 from app.models import Employee
+from app.schedule_cache import bump_schedule_version
+from app.scheduler.repair import repair_schedule
 
 router = APIRouter()
 
@@ -68,10 +70,20 @@ def update_employee(emp_id: int, payload: EmployeeIn, db: Session = Depends(get_
     if not obj:
         raise HTTPException(status_code=404, detail="Сотрудник не найден")
 
-    obj.full_name = (payload.full_name or "").strip()
+    went_sick = payload.on_sick_leave and not obj.on_sick_leave
+    new_name = (payload.full_name or "").strip()
+    if new_name != obj.full_name:
+        # ФИО видно в отрендеренном графике
+        bump_schedule_version(db)
+    obj.full_name = new_name
     obj.is_helper = payload.is_helper
     obj.on_sick_leave = payload.on_sick_leave
 
+    # ушёл на больничный — переставляем только его будущие смены
+    if went_sick:
+        db.flush()
+        repair_schedule(db, emp_id)
+
     try:
         db.commit()
     except IntegrityError as e:
@@ -84,7 +96,10 @@ def update_employee(emp_id: int, payload: EmployeeIn, db: Session = Depends(get_
 def delete_employee(emp_id: int, db: Session = Depends(get_db)):
     obj = db.query(Employee).get(emp_id)
     if obj:
+        # сначала отдаём его будущие смены другим, затем удаляем
+        repair_schedule(db, emp_id)
         db.delete(obj)
+        bump_schedule_version(db)
         try:
             db.commit()
         except IntegrityError as e:
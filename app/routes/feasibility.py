@@ -0,0 +1,32 @@
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.database import SessionLocal
+from app.routes.schedule import is_admin, week_monday
+from app.scheduler.feasibility import check_feasibility
+from app.scheduler.generator import load_problem
+
+router = APIRouter()
+
+
+@router.get("/admin/feasibility")
+def schedule_feasibility(request: Request, start: Optional[str] = Query(None), weeks: int = Query(2, ge=1, le=26)):
+    """
+    Какие дни и локации нельзя закрыть при текущих настройках, правилах и отпусках —
+    без запуска генерации.
+    """
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Только для администратора")
+    try:
+        start_date = datetime.fromisoformat(start).date() if start else week_monday(date.today())
+    except ValueError:
+        start_date = week_monday(date.today())
+
+    db = SessionLocal()
+    try:
+        problem = load_problem(db, start_date, weeks)
+    finally:
+        db.close()
+    return {"start": start_date.isoformat(), "weeks": weeks, "report": check_feasibility(problem).as_dict()}
@@ -0,0 +1,60 @@
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import APIRouter, Form, HTTPException, Request
+
+from app.jobs import get_job, submit_generation
+from app.routes.schedule import is_admin, week_monday
+from app.scheduler.solvers import available
+
+router = APIRouter()
+
+
+def _require_admin(request: Request) -> None:
+    # статистика и ошибки прогона — только админу, как и запуск
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Только для администратора")
+
+
+@router.post("/schedule/jobs", status_code=202)
+def create_generation_job(request: Request, start_iso: str = Form(...), weeks: int = Form(2, ge=1, le=26),
+                          stream: bool = Form(False), solver: Optional[str] = Form(None)):
+    _require_admin(request)
+    if solver and solver not in available():
+        raise HTTPException(status_code=422, detail=f"Неизвестный солвер {solver!r}, доступны: {available()}")
+    try:
+        start_date = datetime.fromisoformat(start_iso).date()
+    except ValueError:
+        start_date = week_monday(date.today())
+
+    # stream — по неделе с коммитом, для длинных горизонтов (квартал и т.п.)
+    options = {"stream": stream}
+    if solver:
+        options["solver"] = solver
+    job_id = submit_generation(start_date, weeks=weeks, **options)
+    return {
+        "job_id": job_id,
+        "status_url": str(request.url_for("generation_job_status", job_id=job_id)),
+        "result_url": str(request.url_for("generation_job_result", job_id=job_id)),
+    }
+
+
+@router.get("/schedule/jobs/{job_id}", name="generation_job_status")
+def generation_job_status(request: Request, job_id: str):
+    _require_admin(request)
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    job.pop("result", None)
+    return job
+
+
+@router.get("/schedule/jobs/{job_id}/result", name="generation_job_result")
+def generation_job_result(request: Request, job_id: str):
+    _require_admin(request)
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Задача ещё не готова: {job['status']}")
+    return job["result"]
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from app.routes.schedule import is_admin
+from app.scheduler.stats import snapshot
+
+router = APIRouter()
+
+
+@router.get("/admin/metrics/generator")
+def generator_metrics(request: Request):
+    """Таймеры фаз и счётчики последних прогонов generate_schedule в этом процессе."""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Только для администратора")
+    return snapshot()
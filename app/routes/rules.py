@@ -0,0 +1,96 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import ConflictPair, Employee, EmployeeRule, Location, LocationRule, WeekendBan
+from app.routes.schedule import is_admin
+
+router = APIRouter()
+
+
+class LocationRuleIn(BaseModel):
+    location_id: int
+    weekend_only: bool = False
+    special_target: bool = False
+    master_class: bool = False
+
+
+class EmployeeRuleIn(BaseModel):
+    employee_id: int
+    need_target_once: bool = False
+    need_master_once: bool = False
+
+
+class WeekendBanIn(BaseModel):
+    employee_id: int
+    location_id: int
+
+
+class ConflictPairIn(BaseModel):
+    employee_id: int
+    other_id: int
+
+
+class RulesIn(BaseModel):
+    locations: List[LocationRuleIn] = []
+    employees: List[EmployeeRuleIn] = []
+    weekend_bans: List[WeekendBanIn] = []
+    conflicts: List[ConflictPairIn] = []
+
+
+def _rows(db: Session, model) -> List[dict]:
+    cols = list(model.__table__.columns)
+    return [dict(zip((c.name for c in cols), r)) for r in db.query(*cols)]
+
+
+@router.get("/admin/rules")
+def get_rules(request: Request, db: Session = Depends(get_db)):
+    """Правила генератора в том виде, в каком их читает load_rules."""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Только для администратора")
+    return {
+        "locations": _rows(db, LocationRule),
+        "employees": _rows(db, EmployeeRule),
+        "weekend_bans": _rows(db, WeekendBan),
+        "conflicts": _rows(db, ConflictPair),
+    }
+
+
+@router.put("/admin/rules")
+def replace_rules(payload: RulesIn, request: Request, db: Session = Depends(get_db)):
+    """Заменяет все правила целиком; следующая генерация уже использует новые."""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Только для администратора")
+
+    emp_ids = {i for (i,) in db.query(Employee.id)}
+    loc_ids = {i for (i,) in db.query(Location.id)}
+    unknown_emp = ({r.employee_id for r in payload.employees}
+                   | {r.employee_id for r in payload.weekend_bans}
+                   | {i for r in payload.conflicts for i in (r.employee_id, r.other_id)}) - emp_ids
+    unknown_loc = ({r.location_id for r in payload.locations}
+                   | {r.location_id for r in payload.weekend_bans}) - loc_ids
+    if unknown_emp or unknown_loc:
+        raise HTTPException(status_code=422, detail={
+            "unknown_employee_ids": sorted(unknown_emp),
+            "unknown_location_ids": sorted(unknown_loc),
+        })
+
+    pairs = {(min(r.employee_id, r.other_id), max(r.employee_id, r.other_id))
+             for r in payload.conflicts if r.employee_id != r.other_id}
+    # повтор ключа в payload — побеждает последний
+    tables = [
+        (LocationRule, list({r.location_id: r.model_dump() for r in payload.locations}.values())),
+        (EmployeeRule, list({r.employee_id: r.model_dump() for r in payload.employees}.values())),
+        (WeekendBan, list({(r.employee_id, r.location_id): r.model_dump() for r in payload.weekend_bans}.values())),
+        (ConflictPair, [{"employee_id": a, "other_id": b} for a, b in sorted(pairs)]),
+    ]
+    for model, rows in tables:
+        db.execute(delete(model))
+        if rows:
+            db.execute(insert(model), rows)
+    db.commit()
+    return {"ok": True, **{model.__tablename__: len(rows) for model, rows in tables}}
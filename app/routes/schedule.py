@@ -9,11 +9,14 @@ from fastapi.templating import Jinja2Templates
 from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from zoneinfo import ZoneInfo
 
 from app.database import SessionLocal
-from app.models import Shift, Location, Employee
-from app.scheduler.generator import generate_schedule
+from app.models import Shift, Location
+from app.jobs import submit_generation
+from app.scheduler.grid import employee_options, load_schedule_grid
+from app.scheduler.history import refresh_week_load
+from app.scheduler.persist import replace_window
+from app.schedule_cache import bump_schedule_version, cached_page_response, published_pages, schedule_version
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -48,40 +51,10 @@ def week_range(d: date):
     return start, end
 
 
-def weekly_rollover(db: Session, now_dt: datetime):
-    """
-    ВОСКРЕСЕНЬЕ >= 16:00 Europe/Berlin:
-    - переводим published текущей недели в archived
-    - удаляем draft этой же недели
-    """
-    tz = ZoneInfo("Europe/Berlin")
-    now = now_dt.astimezone(tz)
-    if now.weekday() != 6 or now.hour < 16:
-        return
-    w_start, w_end = week_range(now.date())
-
-    updated = db.query(Shift).filter(
-        Shift.status == Shift.STATUS_PUBLISHED,
-        Shift.date >= w_start,
-        Shift.date <= w_end,
-    ).update({"status": "archived"}, synchronize_session=False)
-
-    db.query(Shift).filter(
-        Shift.status == Shift.STATUS_DRAFT,
-        Shift.date >= w_start,
-        Shift.date <= w_end,
-    ).delete(synchronize_session=False)
-
-    if updated:
-        db.commit()
-
-
 @router.get("/schedule", response_class=HTMLResponse)
-def schedule_view(request: Request, start: Optional[str] = Query(None)):
+def schedule_view(request: Request, start: Optional[str] = Query(None), job: Optional[str] = Query(None)):
     db: Session = SessionLocal()
     try:
-        weekly_rollover(db, datetime.now(ZoneInfo("Europe/Berlin")))
-
         today = date.today()
         if start:
             try:
@@ -92,64 +65,38 @@ def schedule_view(request: Request, start: Optional[str] = Query(None)):
             start_date = week_monday(today)
 
         dates, pretty, raw = period_dates(start_date, days=14)
-        has_any_current = db.query(Shift).filter(
-            Shift.status.in_([Shift.STATUS_DRAFT, Shift.STATUS_PUBLISHED]),
-            Shift.date >= dates[0],
-            Shift.date <= dates[-1],
-        ).first() is not None
-
-        locations = db.query(Location).order_by(Location.order).all()
-        locations_map = {loc.name: loc.id for loc in locations}
-
-        has_draft = db.query(Shift).filter(
-            Shift.status == Shift.STATUS_DRAFT,
-            Shift.date >= dates[0],
-            Shift.date <= dates[-1],
-        ).first() is not None
-
-        if is_admin(request):
-            basis_status = Shift.STATUS_DRAFT if has_draft else Shift.STATUS_PUBLISHED
-            shifts = db.query(Shift).filter(
-                Shift.status == basis_status,
-                Shift.date >= dates[0],
-                Shift.date <= dates[-1],
-            ).all()
-        else:
-            shifts = db.query(Shift).filter(
-                Shift.status == Shift.STATUS_PUBLISHED,
-                Shift.date >= dates[0],
-                Shift.date <= dates[-1],
-            ).all()
-
-        idx = {(s.location_id, s.date): (s.employee.full_name if s.employee else "") for s in shifts}
-        table = {loc.name: [idx.get((loc.id, d), "") for d in dates] for loc in locations}
-        employees = db.query(Employee).order_by(Employee.full_name).all()
-
-        next_week_start = start_date + timedelta(days=7)
-        next_week_end = next_week_start + timedelta(days=6)
-        has_any_next = db.query(Shift).filter(
-            Shift.date >= next_week_start,
-            Shift.date <= next_week_end,
-            Shift.status.in_([Shift.STATUS_DRAFT, Shift.STATUS_PUBLISHED]),
-        ).first() is not None
-
-        return templates.TemplateResponse(
+        admin = is_admin(request)
+        if not admin:
+            # Публичная страница одинакова для всех до следующего изменения графика
+            version = schedule_version(db)
+            page = published_pages.get(start_date, version)
+            if page is not None:
+                return cached_page_response(request, page)
+
+        grid = load_schedule_grid(db, start_date, days=len(dates))
+        employees = employee_options(db) if admin else []
+
+        response = templates.TemplateResponse(
             "schedule.html",
             {
                 "request": request,
                 "dates": pretty,
                 "raw_dates": raw,
-                "schedule": table,
+                "schedule": grid.table(grid.basis_status(admin)),
                 "employees": employees,
-                "locations_map": locations_map,
-                "is_admin": is_admin(request),
+                "locations_map": grid.locations_map,
+                "is_admin": admin,
                 "start_iso": start_date.isoformat(),
-                "readonly": not is_admin(request),
-                "is_preview": is_admin(request) and has_draft,
-                "can_generate_next": is_admin(request) and (not has_any_next),
-                "is_empty_schedule": is_admin(request) and (not has_any_current),
+                "readonly": not admin,
+                "is_preview": admin and grid.has_draft,
+                "can_generate_next": admin and (not grid.has_any_next),
+                "is_empty_schedule": admin and (not grid.has_any_current),
+                "job_id": job if admin else None,
             },
         )
+        if admin:
+            return response
+        return cached_page_response(request, published_pages.put(start_date, version, response.body))
     finally:
         db.close()
 
@@ -167,7 +114,7 @@ async def schedule_begin_edit(request: Request, start_iso: str = Form(...)):
     dates, _, _ = period_dates(start_date, days=14)
     db: Session = SessionLocal()
     try:
-        pubs = db.query(Shift).filter(
+        pubs = db.query(Shift.date, Shift.location_id, Shift.employee_id).filter(
             Shift.status == Shift.STATUS_PUBLISHED,
             Shift.date >= dates[0],
             Shift.date <= dates[-1],
@@ -175,32 +122,15 @@ async def schedule_begin_edit(request: Request, start_iso: str = Form(...)):
 
         if not pubs:
             # Нет опубликованного — генерируем черновик на окно
-            try:
-                generate_schedule(start_date, weeks=2, persist=True)
-            except Exception:
-                logger.exception("Generation during begin_edit FAILED")
-                return HTMLResponse(
-                    f"<h2>Ошибка генерации</h2><pre>{traceback.format_exc()}</pre>",
-                    status_code=500,
-                )
-            return RedirectResponse(url=f"/schedule?start={start_date.isoformat()}", status_code=302)
+            job_id = submit_generation(start_date, weeks=2)
+            return RedirectResponse(url=f"/schedule?start={start_date.isoformat()}&job={job_id}", status_code=302)
 
         # Чистим draft и копируем published → draft
-        db.query(Shift).filter(
-            Shift.status == Shift.STATUS_DRAFT,
-            Shift.date >= dates[0],
-            Shift.date <= dates[-1],
-        ).delete(synchronize_session=False)
-
-        for s in pubs:
-            db.add(
-                Shift(
-                    date=s.date,
-                    location_id=s.location_id,
-                    employee_id=s.employee_id,
-                    status=Shift.STATUS_DRAFT,
-                )
-            )
+        replace_window(db, dates[0], dates[-1], [Shift.STATUS_DRAFT], (
+            {"date": d, "location_id": loc_id, "employee_id": emp_id, "status": Shift.STATUS_DRAFT}
+            for d, loc_id, emp_id in pubs
+        ))
+        bump_schedule_version(db)
         db.commit()
         return RedirectResponse(url=f"/schedule?start={start_date.isoformat()}", status_code=302)
     finally:
@@ -218,15 +148,8 @@ def schedule_generate_next(request: Request, start_iso: str = Form(...)):
         start_date = week_monday(date.today())
 
     next_week_start = start_date + timedelta(days=7)
-    try:
-        generate_schedule(next_week_start, weeks=1, persist=True)
-        return RedirectResponse(url=f"/schedule?start={start_date.isoformat()}", status_code=302)
-    except Exception:
-        logger.exception("Generation of next week FAILED")
-        return HTMLResponse(
-            f"<h2>Ошибка генерации следующей недели</h2><pre>{traceback.format_exc()}</pre>",
-            status_code=500
-        )
+    job_id = submit_generation(next_week_start, weeks=1)
+    return RedirectResponse(url=f"/schedule?start={start_date.isoformat()}&job={job_id}", status_code=302)
 
 
 @router.post("/schedule/save", name="schedule_save")
@@ -267,6 +190,8 @@ async def schedule_save(request: Request, start_iso: str = Form(...)):
                 Shift.date <= dates[-1],
                 Shift.status == Shift.STATUS_DRAFT,
             ).update({"status": Shift.STATUS_PUBLISHED}, synchronize_session=False)
+            refresh_week_load(db, dates[0], dates[-1])
+            bump_schedule_version(db)
 
             db.commit()
             if not updated:
@@ -281,15 +206,6 @@ async def schedule_save(request: Request, start_iso: str = Form(...)):
         locations = db.query(Location).order_by(Location.order).all()
         loc_ids = [l.id for l in locations]
 
-        # Сносим всё окно (и draft, и published)
-        db.execute(
-            delete(Shift).where(
-                Shift.date >= dates[0],
-                Shift.date <= dates[-1],
-                Shift.status.in_([Shift.STATUS_PUBLISHED, Shift.STATUS_DRAFT]),
-            )
-        )
-
         new_published = []
         for d in dates:
             d_iso = d.isoformat()
@@ -302,17 +218,17 @@ async def schedule_save(request: Request, start_iso: str = Form(...)):
                     emp_id = int(val)
                 except ValueError:
                     continue
-                new_published.append(
-                    Shift(
-                        date=d,
-                        location_id=loc_id,
-                        employee_id=emp_id,
-                        status=Shift.STATUS_PUBLISHED,
-                    )
-                )
-
-        if new_published:
-            db.add_all(new_published)
+                new_published.append({
+                    "date": d,
+                    "location_id": loc_id,
+                    "employee_id": emp_id,
+                    "status": Shift.STATUS_PUBLISHED,
+                })
+
+        # Сносим всё окно (и draft, и published) и пишем опубликованные одним пакетом
+        replace_window(db, dates[0], dates[-1], [Shift.STATUS_PUBLISHED, Shift.STATUS_DRAFT], new_published)
+        refresh_week_load(db, dates[0], dates[-1])
+        bump_schedule_version(db)
 
         db.commit()
         return RedirectResponse(url=f"/schedule?start={start_date.isoformat()}", status_code=302)
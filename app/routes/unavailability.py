@@ -0,0 +1,81 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import Employee, Unavailability
+from app.routes.schedule import is_admin
+from app.schemas import UnavailablePeriod
+
+router = APIRouter()
+
+
+class UnavailabilityIn(UnavailablePeriod):
+    employee_id: int
+    reason: str = Unavailability.REASON_VACATION
+
+
+def _require_admin(request: Request) -> None:
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Только для администратора")
+
+
+@router.get("/admin/unavailability")
+def list_unavailability(
+    request: Request,
+    employee_id: Optional[int] = Query(None),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+):
+    """Периоды недоступности, пересекающие [from, to] (границы необязательны)."""
+    _require_admin(request)
+    q = db.query(Unavailability.id, Unavailability.employee_id, Unavailability.start_date,
+                 Unavailability.end_date, Unavailability.reason)
+    if employee_id is not None:
+        q = q.filter(Unavailability.employee_id == employee_id)
+    if date_from is not None:
+        q = q.filter(Unavailability.end_date >= date_from)
+    if date_to is not None:
+        q = q.filter(Unavailability.start_date <= date_to)
+    return [
+        {"id": r.id, "employee_id": r.employee_id, "start_date": r.start_date.isoformat(),
+         "end_date": r.end_date.isoformat(), "reason": r.reason}
+        for r in q.order_by(Unavailability.employee_id, Unavailability.start_date)
+    ]
+
+
+@router.post("/admin/unavailability/bulk", status_code=201)
+def upload_unavailability(payload: List[UnavailabilityIn], request: Request, db: Session = Depends(get_db)):
+    """
+    Пакетная загрузка отпусков и больничных: всё или ничего, одним INSERT.
+    Следующая генерация исключает эти дни; уже построенные графики не переписываются.
+    """
+    _require_admin(request)
+    errors = []
+    emp_ids = {i for (i,) in db.query(Employee.id)}
+    for n, p in enumerate(payload):
+        if p.employee_id not in emp_ids:
+            errors.append({"index": n, "error": f"unknown employee_id {p.employee_id}"})
+        if p.end_date < p.start_date:
+            errors.append({"index": n, "error": "end_date before start_date"})
+        if p.reason not in (Unavailability.REASON_VACATION, Unavailability.REASON_SICK):
+            errors.append({"index": n, "error": f"unknown reason {p.reason!r}"})
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    rows = [p.model_dump(include={"employee_id", "start_date", "end_date", "reason"}) for p in payload]
+    if rows:
+        db.execute(insert(Unavailability), rows)
+    db.commit()
+    return {"inserted": len(rows)}
+
+
+@router.delete("/admin/unavailability/{period_id}", status_code=204)
+def delete_unavailability(period_id: int, request: Request, db: Session = Depends(get_db)):
+    _require_admin(request)
+    db.query(Unavailability).filter(Unavailability.id == period_id).delete(synchronize_session=False)
+    db.commit()
@@ -1,8 +1,44 @@
+from typing import Optional
+
 from alembic import command
 from alembic.config import Config
+from sqlalchemy import create_engine, inspect
 import os
 
-def run_migrations():
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.db_base import Base
+
+# База, созданная init_db() (create_all) без миграций, соответствует этой ревизии;
+# следующие миграции проверяют схему сами и применяются к ней безопасно
+CREATE_ALL_BASELINE = "0004_add_status_to_unique_constraint"
+
+
+def _prepare_unversioned(url: str, alembic_cfg: Config) -> None:
+    """
+    База без alembic_version: цепочку с 0001 на ней не проигрываем.
+    Пустая — схема создаётся по моделям и помечается head (0001–0004 создали бы
+    устаревшие таблицы, которые create_all потом не тронет); созданная init_db() —
+    помечается CREATE_ALL_BASELINE, дальше обычный upgrade.
+    """
+    from app import models  # noqa: F401 — регистрирует таблицы в Base.metadata
+
+    engine = create_engine(url)
+    try:
+        tables = set(inspect(engine).get_table_names())
+        if "alembic_version" in tables:
+            return
+        if not tables:
+            Base.metadata.create_all(bind=engine)
+            command.stamp(alembic_cfg, "head")
+        elif "shifts" in tables:
+            command.stamp(alembic_cfg, CREATE_ALL_BASELINE)
+    finally:
+        engine.dispose()
+
+
+def run_migrations(url: Optional[str] = None):
+    url = url or SQLALCHEMY_DATABASE_URL
+
     # Создаём абсолютный путь к alembic.ini
     base_dir = os.path.dirname(os.path.abspath(__file__))
     alembic_ini_path = os.path.join(base_dir, "..", "migrations", "alembic.ini")
@@ -10,10 +46,12 @@ def run_migrations():
     # Создаём конфигурацию Alembic
     alembic_cfg = Config(alembic_ini_path)
 
-    # Явно указываем путь к папке миграций и URL базы данных
+    # Явно указываем путь к папке миграций и URL базы данных (той же, что у приложения)
     migrations_path = os.path.join(base_dir, "..", "migrations")
     alembic_cfg.set_main_option("script_location", migrations_path)
-    alembic_cfg.set_main_option("sqlalchemy.url", "sqlite:///scheduler.db")
+    alembic_cfg.set_main_option("sqlalchemy.url", url.replace("%", "%%"))  # % — интерполяция ConfigParser
+
+    _prepare_unversioned(url, alembic_cfg)
 
     # Применяем миграции до актуальной версии
     command.upgrade(alembic_cfg, "head")
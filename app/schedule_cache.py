@@ -0,0 +1,108 @@
+"""
+Кэш отрендеренной публичной страницы графика.
+
+Ключ — дата начала окна и версия графика из schedule_version. Версия живёт в БД,
+поэтому изменение в одном процессе инвалидирует кэш во всех: каждый запрос
+читает одну строку по первичному ключу и, если версия та же, отдаёт готовые байты.
+ETag — хэш тела (сильный): совпал If-None-Match — ответ 304 без тела.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import ScheduleVersion
+
+# Сколько разных окон держать в памяти процесса
+CACHE_MAX_ENTRIES = 32
+
+
+def ensure_schedule_version(session: Session) -> None:
+    """
+    Создаёт строку id=1 при старте (init_db), чтобы bump был одним UPDATE:
+    вставка из bump гонялась бы у двух первых одновременных писателей.
+    """
+    if session.execute(select(ScheduleVersion.id).where(ScheduleVersion.id == 1)).first():
+        return
+    try:
+        session.execute(insert(ScheduleVersion).values(id=1, version=0))
+        session.commit()
+    except IntegrityError:
+        session.rollback()  # строку только что создал другой воркер
+
+
+def bump_schedule_version(session: Session) -> None:
+    """Вызывать в транзакции, меняющей смены или имена; коммит — у вызывающего."""
+    session.execute(update(ScheduleVersion).where(ScheduleVersion.id == 1)
+                    .values(version=ScheduleVersion.version + 1))
+
+
+def schedule_version(session: Session) -> int:
+    return session.execute(select(ScheduleVersion.version).where(ScheduleVersion.id == 1)).scalar() or 0
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    version: int
+    etag: str
+    body: bytes
+
+
+class PublishedPageCache:
+    """LRU по дате начала окна; запись с устаревшей версией просто не отдаётся."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._pages: "OrderedDict[date, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, start: date, version: int) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._pages.get(start)
+            if page is None or page.version != version:
+                return None
+            self._pages.move_to_end(start)
+            return page
+
+    def put(self, start: date, version: int, body: bytes) -> CachedPage:
+        page = CachedPage(version=version, etag='"%s"' % hashlib.sha256(body).hexdigest()[:32], body=body)
+        with self._lock:
+            self._pages[start] = page
+            self._pages.move_to_end(start)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+        return page
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match сравнивается слабо (RFC 9110): префикс W/ игнорируется, "*" совпадает всегда."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+published_pages = PublishedPageCache()
+
+
+def cached_page_response(request: Request, page: CachedPage) -> Response:
+    # no-cache: браузер хранит страницу, но каждый раз переспрашивает по ETag
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(page.body, headers=headers)
@@ -0,0 +1,253 @@
+"""
+Бенчмарк генератора на синтетических данных.
+
+    python -m app.scheduler.bench --sizes 50x10,200x40 --weeks 2 --out bench_baseline.json
+    python -m app.scheduler.bench --compare --sizes 50x10,200x40 --out bench_solvers.json
+
+Для каждого размера создаётся отдельная in-memory SQLite с синтетическими
+Employee/Location/EmployeeSetting, затем по фазам замеряются load_problem,
+solve, balance_assignments, improve, persist_solution и balance_schedule.
+Время и пиковая память снимаются разными прогонами (tracemalloc искажает время).
+--compare прогоняет все солверы из реестра (app.scheduler.solvers) на одних
+и тех же данных и сидах и сводит время, заполненность и сумму мягких штрафов.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db_base import Base
+from app.models import Employee, EmployeeSetting, Location
+from app.scheduler.generator import (
+    SOLVER_GREEDY,
+    balance_assignments,
+    balance_schedule,
+    load_problem,
+    solve,
+)
+from app.scheduler.improve import schedule_cost
+from app.scheduler.persist import persist_solution
+from app.scheduler.problem import ScheduleProblem, ScheduleSolution
+from app.scheduler.state import EMPTY_CELL_PENALTY
+
+
+@dataclass
+class SyntheticSpec:
+    employees: int = 50
+    locations: int = 10
+    zones: int = 4
+    weeks: int = 2
+    allowed_density: float = 0.6     # доля разрешённых пар сотрудник × локация
+    preference_density: float = 0.1  # доля предпочтений среди разрешённых
+    seed: int = 0
+
+
+@dataclass
+class BenchResult:
+    spec: SyntheticSpec
+    solver: str
+    phases: Dict[str, float] = field(default_factory=dict)
+    total_seconds: float = 0.0
+    peak_memory_kb: float = 0.0
+    filled_cells: int = 0
+    open_cells: int = 0
+    filled_ratio: float = 0.0
+    fairness_spread: int = 0
+    fairness_stdev: float = 0.0
+    soft_penalty: int = 0  # schedule_cost без штрафа за пустые ячейки (меньше — лучше)
+
+
+def make_session() -> Session:
+    """Изолированная in-memory SQLite со схемой приложения."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def make_synthetic(session: Session, spec: SyntheticSpec) -> None:
+    """Заполняет БД синтетическими сотрудниками, локациями и настройками."""
+    rng = random.Random(spec.seed)
+    locations = [
+        Location(name=f"Локация {j + 1}", order=j + 1, zone=f"zone_{j % max(spec.zones, 1)}")
+        for j in range(spec.locations)
+    ]
+    employees = [Employee(full_name=f"Сотрудник {i + 1:04d}") for i in range(spec.employees)]
+    session.add_all(locations + employees)
+    session.flush()
+
+    settings = []
+    for e in employees:
+        for l in locations:
+            if rng.random() >= spec.allowed_density:
+                settings.append({"employee_id": e.id, "location_id": l.id,
+                                 "is_allowed": False, "is_preferred": False})
+            elif rng.random() < spec.preference_density:
+                settings.append({"employee_id": e.id, "location_id": l.id,
+                                 "is_allowed": True, "is_preferred": True})
+    session.bulk_insert_mappings(EmployeeSetting, settings)
+    session.commit()
+
+
+def open_cells(problem: ScheduleProblem) -> int:
+    return sum(1 for d in problem.dates for l in problem.locations if problem.is_open(l, d))
+
+
+def fairness(problem: ScheduleProblem, solution: ScheduleSolution):
+    """Разброс и стандартное отклонение числа смен на сотрудника за горизонт."""
+    totals: Dict[int, int] = defaultdict(int)
+    for _, _, emp_id in solution.assignments():
+        totals[emp_id] += 1
+    loads = [totals.get(e.id, 0) for e in problem.employees]
+    if not loads:
+        return 0, 0.0
+    return max(loads) - min(loads), round(statistics.pstdev(loads), 3)
+
+
+def _prepared_session(spec: SyntheticSpec) -> Session:
+    session = make_session()
+    make_synthetic(session, spec)
+    return session
+
+
+def _pipeline(session: Session, spec: SyntheticSpec, solver: str, improve_seconds: float, start: date,
+              phases: Optional[Dict[str, float]] = None):
+    """Один прогон всех фаз на подготовленной БД; phases — куда писать таймеры."""
+    rng = random.Random(spec.seed)
+
+    def phase(name, fn, *args, **kwargs):
+        t = time.perf_counter()
+        out = fn(*args, **kwargs)
+        if phases is not None:
+            phases[name] = round(time.perf_counter() - t, 6)
+        return out
+
+    problem = phase("load", load_problem, session, start, spec.weeks)
+    solution = phase("solve", solve, problem, rng=rng, solver=solver)
+    phase("balance", balance_assignments, problem, solution)
+    if improve_seconds > 0:
+        from app.scheduler.improve import improve
+        phase("improve", improve, problem, solution, improve_seconds, rng=rng)
+    phase("persist", persist_solution, session, solution)
+    phase("commit", session.commit)
+    phase("balance_db", balance_schedule, session, problem)
+    return problem, solution
+
+
+def run_bench(spec: SyntheticSpec, solver: str = SOLVER_GREEDY, improve_seconds: float = 0.0,
+              start: Optional[date] = None, measure_memory: bool = True) -> BenchResult:
+    """
+    Два прогона на одинаковых данных и сиде. Время — без tracemalloc: он замедляет
+    каждую аллокацию, причём по-разному для разных солверов, и сравнение теряет смысл.
+    Пиковая память — отдельным прогоном под tracemalloc (measure_memory=False — пропустить).
+    """
+    start = start or date.today() - timedelta(days=date.today().weekday())
+    result = BenchResult(spec=spec, solver=solver)
+
+    session = _prepared_session(spec)
+    try:
+        t_all = time.perf_counter()
+        problem, solution = _pipeline(session, spec, solver, improve_seconds, start, result.phases)
+        result.total_seconds = round(time.perf_counter() - t_all, 6)
+    finally:
+        session.close()
+
+    if measure_memory:
+        session = _prepared_session(spec)
+        tracemalloc.start()
+        try:
+            _pipeline(session, spec, solver, improve_seconds, start)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            session.close()
+        result.peak_memory_kb = round(peak / 1024, 1)
+
+    result.filled_cells = solution.filled()
+    result.open_cells = open_cells(problem)
+    result.filled_ratio = round(result.filled_cells / result.open_cells, 4) if result.open_cells else 0.0
+    result.fairness_spread, result.fairness_stdev = fairness(problem, solution)
+    result.soft_penalty = (schedule_cost(problem, solution)
+                           - EMPTY_CELL_PENALTY * (result.open_cells - result.filled_cells))
+    return result
+
+
+def print_comparison(results: List[BenchResult]) -> None:
+    """Сводка --compare: по каждому размеру солверы рядом; время — из прогона без tracemalloc."""
+    print(f"{'size':>10} {'solver':>12} {'solve,s':>9} {'total,s':>9} {'filled':>8} {'soft':>10} {'spread':>7}")
+    for r in results:
+        size = f"{r.spec.employees}x{r.spec.locations}"
+        print(f"{size:>10} {r.solver:>12} {r.phases['solve']:>9.3f} {r.total_seconds:>9.3f} "
+              f"{r.filled_ratio:>8.2%} {r.soft_penalty:>10} {r.fairness_spread:>7}")
+
+
+def write_report(results: List[BenchResult], path: str) -> None:
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [asdict(r) for r in results],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def _parse_sizes(raw: str):
+    for item in raw.split(","):
+        emps, locs = item.lower().split("x")
+        yield int(emps), int(locs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк генератора расписания")
+    parser.add_argument("--sizes", default="20x8,100x20,300x60", help="сотрудники x локации, через запятую")
+    parser.add_argument("--zones", type=int, default=4)
+    parser.add_argument("--weeks", type=int, default=2)
+    parser.add_argument("--allowed-density", type=float, default=0.6)
+    parser.add_argument("--preference-density", type=float, default=0.1)
+    parser.add_argument("--solver", default=SOLVER_GREEDY)
+    parser.add_argument("--compare", action="store_true", help="все солверы из реестра на одних данных")
+    parser.add_argument("--improve-seconds", type=float, default=0.0)
+    parser.add_argument("--no-memory", action="store_true", help="не делать прогон под tracemalloc")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_baseline.json")
+    args = parser.parse_args(argv)
+
+    from app.scheduler.solvers import available
+    solvers = available() if args.compare else [args.solver]
+
+    results = []
+    for emps, locs in _parse_sizes(args.sizes):
+        spec = SyntheticSpec(
+            employees=emps, locations=locs, zones=args.zones, weeks=args.weeks,
+            allowed_density=args.allowed_density, preference_density=args.preference_density,
+            seed=args.seed,
+        )
+        for solver in solvers:
+            r = run_bench(spec, solver=solver, improve_seconds=args.improve_seconds,
+                          measure_memory=not args.no_memory)
+            results.append(r)
+            print(f"{emps}x{locs} w={args.weeks} {solver}: {r.total_seconds:.3f}s "
+                  f"solve={r.phases['solve']:.3f}s peak={r.peak_memory_kb:.0f}KB "
+                  f"filled={r.filled_ratio:.2%} soft={r.soft_penalty} "
+                  f"spread={r.fairness_spread} phases={r.phases}")
+
+    if args.compare:
+        print_comparison(results)
+    write_report(results, args.out)
+    print(f"report -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
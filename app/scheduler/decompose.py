@@ -0,0 +1,174 @@
+"""
+Генерация с разбиением по зонам.
+
+Запрет пары (employee_conflicts) действует только внутри зоны, а лимиты дня,
+недели и серии связывают сотрудника глобально. Поэтому ёмкость каждого
+сотрудника целиком отдаётся одной «домашней» зоне: подзадачи зон становятся
+независимыми и решаются параллельно в пуле процессов, а время растёт
+с размером самой большой зоны, а не всей сети.
+
+После слияния глобальный проход reconcile заново укладывает сетку через
+ScheduleState: назначения, нарушающие жёсткие ограничения, снимаются,
+а пустые ячейки добираются свободной ёмкостью сотрудников любых зон.
+"""
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.scheduler.eligibility import WEEKDAY, WEEKEND, compile_rules, iter_bits
+from app.scheduler.generator import SOLVER_GREEDY, run_pipeline
+from app.scheduler.multistart import run_seeds
+from app.scheduler.problem import ScheduleProblem, ScheduleSolution
+from app.scheduler.state import SOFT_WEEK_TARGET, ScheduleState
+from app.scheduler.stats import GenerationStats
+
+logger = logging.getLogger("scheduler")
+
+
+def _open_count(problem: ScheduleProblem, locations) -> int:
+    return sum(1 for d in problem.dates for l in locations if problem.is_open(l, d))
+
+
+def split_by_zone(problem: ScheduleProblem) -> Dict[Optional[str], ScheduleProblem]:
+    """
+    Подзадачи по Location.zone. Каждый сотрудник попадает ровно в одну зону из тех,
+    где ему разрешена хоть одна локация: сначала самые «узкие» сотрудники,
+    каждого — в зону с наибольшим ещё не покрытым спросом (открытые ячейки
+    минус SOFT_WEEK_TARGET * weeks за каждого уже отданного сотрудника).
+    """
+    matrix = compile_rules(problem)
+    zones: List[Optional[str]] = []
+    locs_by_zone: Dict[Optional[str], list] = {}
+    for loc in problem.locations:
+        if loc.zone not in locs_by_zone:
+            zones.append(loc.zone)
+            locs_by_zone[loc.zone] = []
+        locs_by_zone[loc.zone].append(loc)
+
+    zone_mask = {z: 0 for z in zones}
+    for j, loc in enumerate(problem.locations):
+        zone_mask[loc.zone] |= matrix.allowed[j][WEEKDAY] | matrix.allowed[j][WEEKEND]
+
+    remaining = {z: _open_count(problem, locs_by_zone[z]) for z in zones}
+    capacity = SOFT_WEEK_TARGET * problem.weeks
+    home: Dict[Optional[str], list] = {z: [] for z in zones}
+
+    options = []
+    for i, emp in enumerate(problem.employees):
+        own = [z for z in zones if (zone_mask[z] >> i) & 1]
+        if own:
+            options.append((len(own), emp.id, emp, own))
+    for _, _, emp, own in sorted(options, key=lambda o: (o[0], o[1])):
+        z = max(own, key=lambda z: remaining[z])  # при равенстве — первая по порядку локаций
+        home[z].append(emp)
+        remaining[z] -= capacity
+
+    return {
+        z: ScheduleProblem(
+            start=problem.start,
+            weeks=problem.weeks,
+            employees=tuple(home[z]),
+            locations=tuple(locs_by_zone[z]),
+            settings_map=problem.settings_map,
+            weekend_only_emp=problem.weekend_only_emp,
+            rules=problem.rules,
+            unavailability=problem.unavailability,
+            prior_streak=problem.prior_streak,
+            prior_totals=problem.prior_totals,
+        )
+        for z in zones
+    }
+
+
+def _solve_zone(args) -> ScheduleSolution:
+    sub, solver, seed = args
+    return run_pipeline(sub, solver=solver, seed=seed)
+
+
+def reconcile(problem: ScheduleProblem, parts: Dict[Optional[str], ScheduleSolution]) -> Tuple[ScheduleSolution, int, int]:
+    """
+    Сливает сетки зон в общую и проверяет её глобально: назначения укладываются
+    по дням через ScheduleState.can_place (нарушение лимитов снимается),
+    затем каждая пустая открытая ячейка получает кандидата с лучшей дельтой.
+    Возвращает (сетка, снято назначений, дозаполнено ячеек).
+    """
+    solution = ScheduleSolution.empty(problem)
+    state = ScheduleState(problem, solution)
+    loc_pos = {l.id: j for j, l in enumerate(problem.locations)}
+    emp_index = state.matrix.emp_index
+
+    dropped = 0
+    for d in range(len(solution.dates)):
+        for part in parts.values():
+            for loc_id, emp_id in zip(part.location_ids, part.grid[d]):
+                if emp_id is None:
+                    continue
+                i, j = emp_index.get(emp_id), loc_pos[loc_id]
+                if i is not None and state.can_place(i, d, j):
+                    state.place(i, d, j)
+                else:
+                    dropped += 1
+
+    filled = 0
+    for d, j in state.open_cells:
+        if solution.grid[d][j] is not None:
+            continue
+        best = None
+        for i in iter_bits(state.matrix.allowed[j][state.cls_of[d]]):
+            if not state.can_place(i, d, j):
+                continue
+            delta = state.place(i, d, j)
+            state.unplace(i, d, j)
+            if best is None or delta < best[0]:
+                best = (delta, i)
+        if best is not None:
+            state.place(best[1], d, j)
+            filled += 1
+    return solution, dropped, filled
+
+
+def solve_decomposed(problem: ScheduleProblem, solver: str = SOLVER_GREEDY, seed: Optional[int] = None,
+                     max_workers: Optional[int] = None) -> ScheduleSolution:
+    """
+    Зоны решаются независимо (run_pipeline, по процессу на зону), затем reconcile.
+    Сиды зон выводятся из seed так же, как в multistart, — прогон воспроизводим.
+    Таймеры "zones" и "reconcile" и сумма счётчиков зон — в solution.stats.
+    """
+    stats = GenerationStats(start=problem.start.isoformat(), weeks=problem.weeks,
+                            solver=f"{solver}+zones", seed=seed)
+    subproblems = split_by_zone(problem)
+    zones = list(subproblems)
+    seeds = run_seeds(len(zones), seed if seed is not None else random.getrandbits(32))
+    jobs = [(subproblems[z], solver, s) for z, s in zip(zones, seeds)]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs)) if jobs else 1
+
+    t = time.perf_counter()
+    if workers <= 1:
+        results = [_solve_zone(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_solve_zone, jobs))
+    stats.phases["zones"] = round(time.perf_counter() - t, 6)
+
+    for part in results:
+        part_stats = part.stats
+        stats.candidates_evaluated += part_stats.candidates_evaluated
+        stats.preferred_fallbacks += part_stats.preferred_fallbacks
+        stats.special_overrides += part_stats.special_overrides
+        for size, n in part_stats.pool_sizes.items():
+            stats.pool_sizes[size] = stats.pool_sizes.get(size, 0) + n
+
+    with stats.timer("reconcile"):
+        solution, dropped, refilled = reconcile(problem, dict(zip(zones, results)))
+    solution.seed = seed
+    solution.stats = stats
+    stats.filled_cells = solution.filled()
+    stats.empty_cells = _open_count(problem, problem.locations) - stats.filled_cells
+
+    logger.info("decomposed: zones=%s workers=%d dropped=%d refilled=%d filled=%d",
+                {z: len(subproblems[z].employees) for z in zones}, workers, dropped, refilled,
+                stats.filled_cells)
+    return solution
@@ -0,0 +1,155 @@
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Классы дней: будни и выходные (сб, вс) фильтруются по-разному
+WEEKDAY = 0
+WEEKEND = 1
+
+
+def day_class(weekday: int) -> int:
+    return WEEKEND if weekday in (5, 6) else WEEKDAY
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Индексы установленных битов по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class EligibilityMatrix:
+    """
+    Плотная матрица сотрудники × локации × класс дня, упакованная в битовые маски.
+
+    allowed[loc_idx][cls] / preferred[loc_idx][cls] — int, где бит i означает,
+    что сотрудник employees[i] проходит все жёсткие фильтры для этой ячейки:
+    настройки локации, weekend-only, запреты выходных (employee_weekend_bans)
+    и закрытые в будни локации. Строится один раз на генерацию.
+
+    Остальные правила RuleSet тоже скомпилированы в индексы: closed_weekdays,
+    target_loc, master_loc — по loc_idx; need_target, need_master — маски сотрудников.
+    away[day_idx] — маска недоступных в этот день (отпуск/больничный) по dates прогона.
+    """
+
+    __slots__ = (
+        "employees", "locations", "emp_index", "loc_index",
+        "allowed", "preferred", "weekend_only", "conflict", "full",
+        "closed_weekdays", "target_loc", "master_loc", "need_target", "need_master", "away",
+    )
+
+    def __init__(self, employees: Sequence, locations: Sequence):
+        self.employees = list(employees)
+        self.locations = list(locations)
+        self.emp_index: Dict[int, int] = {e.id: i for i, e in enumerate(self.employees)}
+        self.loc_index: Dict[int, int] = {l.id: j for j, l in enumerate(self.locations)}
+        self.allowed: List[List[int]] = [[0, 0] for _ in self.locations]
+        self.preferred: List[List[int]] = [[0, 0] for _ in self.locations]
+        self.weekend_only = 0
+        # conflict[i] — маска сотрудников, с которыми i нельзя ставить в одну зону в один день
+        self.conflict: List[int] = [0] * len(self.employees)
+        self.full = (1 << len(self.employees)) - 1
+        self.closed_weekdays: List[bool] = [False] * len(self.locations)
+        self.target_loc: List[bool] = [False] * len(self.locations)
+        self.master_loc: List[bool] = [False] * len(self.locations)
+        self.need_target = 0
+        self.need_master = 0
+        self.away: List[int] = []
+
+    def candidates(self, loc_idx: int, cls: int, preferred_only: bool) -> int:
+        table = self.preferred if preferred_only else self.allowed
+        return table[loc_idx][cls]
+
+    def mask_of(self, emp_ids) -> int:
+        mask = 0
+        for emp_id in emp_ids:
+            i = self.emp_index.get(emp_id)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+
+def build_eligibility(
+    employees: Sequence,
+    settings_map: Dict[Tuple[int, int], object],
+    locations: Sequence,
+    weekend_only_emp: Dict[int, bool],
+    rules,
+    dates: Sequence[date] = (),
+    unavailability: Sequence[Tuple[int, date, date]] = (),
+) -> EligibilityMatrix:
+    """Компилирует настройки и RuleSet (app.scheduler.problem) в битовые маски по индексам."""
+    m = EligibilityMatrix(employees, locations)
+    m.away = away_masks(m.emp_index, dates, unavailability)
+
+    for i, emp in enumerate(m.employees):
+        if weekend_only_emp.get(emp.id, False):
+            m.weekend_only |= 1 << i
+
+    m.need_target = m.mask_of(rules.need_target)
+    m.need_master = m.mask_of(rules.need_master)
+    for a, b in rules.conflicts:
+        i, k = m.emp_index.get(a), m.emp_index.get(b)
+        if i is not None and k is not None and i != k:
+            m.conflict[i] |= 1 << k
+            m.conflict[k] |= 1 << i
+
+    banned: Dict[int, int] = {}  # loc_idx -> маска сотрудников, которым нельзя в выходные
+    for emp_id, loc_id in rules.weekend_bans:
+        i, j = m.emp_index.get(emp_id), m.loc_index.get(loc_id)
+        if i is not None and j is not None:
+            banned[j] = banned.get(j, 0) | 1 << i
+
+    for j, loc in enumerate(m.locations):
+        closed_on_weekdays = loc.id in rules.weekend_only_locations
+        m.closed_weekdays[j] = closed_on_weekdays
+        m.target_loc[j] = loc.id in rules.target_locations
+        m.master_loc[j] = loc.id in rules.master_locations
+        weekend_banned = banned.get(j, 0)
+        for i, emp in enumerate(m.employees):
+            es: Optional[object] = settings_map.get((emp.id, loc.id))
+            if es is not None and not es.is_allowed:
+                continue
+            bit = 1 << i
+            is_pref = es is not None and getattr(es, "is_preferred", False)
+
+            if not closed_on_weekdays and not (m.weekend_only & bit):
+                m.allowed[j][WEEKDAY] |= bit
+                if is_pref:
+                    m.preferred[j][WEEKDAY] |= bit
+
+            if not (weekend_banned & bit):
+                m.allowed[j][WEEKEND] |= bit
+                if is_pref:
+                    m.preferred[j][WEEKEND] |= bit
+
+    return m
+
+
+def away_masks(emp_index: Dict[int, int], dates: Sequence[date],
+               unavailability: Sequence[Tuple[int, date, date]]) -> List[int]:
+    """
+    Интервалы недоступности -> маска недоступных сотрудников на каждый день окна.
+    Строится один раз, дальше проверка дня — один AND.
+    """
+    away = [0] * len(dates)
+    if not dates:
+        return away
+    first = dates[0]
+    last = len(dates) - 1
+    for emp_id, start, end in unavailability:
+        i = emp_index.get(emp_id)
+        if i is None:
+            continue
+        bit = 1 << i
+        for d in range(max((start - first).days, 0), min((end - first).days, last) + 1):
+            away[d] |= bit
+    return away
+
+
+def compile_rules(problem) -> EligibilityMatrix:
+    """build_eligibility по снимку ScheduleProblem — один раз на прогон солвера."""
+    return build_eligibility(
+        problem.employees, problem.settings_map, problem.locations,
+        problem.weekend_only_emp, problem.rules, problem.dates, problem.unavailability,
+    )
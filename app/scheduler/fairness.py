@@ -0,0 +1,37 @@
+class LoadHistogram:
+    """
+    Гистограмма недельной нагрузки (counts-of-counts) с масками сотрудников
+    по каждому уровню нагрузки. min/max и «кто на минимуме» поддерживаются
+    инкрементально: bump() — O(1) амортизированно, запросы — O(1).
+    """
+
+    __slots__ = ("count", "members", "min", "max")
+
+    def __init__(self, tracked_mask: int):
+        self.count = [tracked_mask.bit_count()]
+        self.members = [tracked_mask]
+        self.min = 0
+        self.max = 0
+
+    def bump(self, i: int, load: int) -> None:
+        """Сотрудник i перешёл с нагрузки load на load + 1."""
+        bit = 1 << i
+        if load >= len(self.members) or not self.members[load] & bit:
+            return  # сотрудник не отслеживается (например, только выходные)
+        self.members[load] &= ~bit
+        self.count[load] -= 1
+        if load + 1 == len(self.count):
+            self.count.append(0)
+            self.members.append(0)
+        self.members[load + 1] |= bit
+        self.count[load + 1] += 1
+        if load + 1 > self.max:
+            self.max = load + 1
+        while self.count[self.min] == 0 and self.min < self.max:
+            self.min += 1
+
+    def spread(self) -> int:
+        return self.max - self.min if self.count[self.min] else 0
+
+    def at_min(self) -> int:
+        return self.members[self.min]
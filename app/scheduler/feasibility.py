@@ -0,0 +1,156 @@
+"""
+Проверка выполнимости до запуска солвера.
+
+Для каждого дня — максимальное паросочетание «открытые локации × допустимые
+сотрудники» (настройки, weekend-only, запреты выходных, недоступность).
+Его размер — верхняя граница числа заполнимых ячеек дня; незакрытые локации
+и «узкое место» (множество локаций, которым по теореме Холла не хватает
+кандидатов) попадают в отчёт. Для недели дополнительно сравниваются открытые
+ячейки с суммарной ёмкостью сотрудников под HARD_WEEK_CAP.
+"""
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple
+
+from app.scheduler.eligibility import EligibilityMatrix, compile_rules, day_class, iter_bits
+from app.scheduler.problem import ScheduleProblem
+from app.scheduler.state import HARD_WEEK_CAP
+
+
+@dataclass
+class Bottleneck:
+    """Локации, которые делят между собой слишком мало кандидатов."""
+
+    locations: List[str]
+    candidates: List[str]
+
+
+@dataclass
+class DayReport:
+    date: str
+    open_cells: int
+    max_staffed: int
+    unstaffed: List[str] = field(default_factory=list)
+    bottleneck: Optional[Bottleneck] = None
+
+
+@dataclass
+class WeekReport:
+    week_start: str
+    open_cells: int
+    capacity: int  # сумма min(HARD_WEEK_CAP, дней, когда сотрудник куда-то допустим)
+
+
+@dataclass
+class FeasibilityReport:
+    days: List[DayReport] = field(default_factory=list)
+    weeks: List[WeekReport] = field(default_factory=list)
+
+    @property
+    def deficit(self) -> int:
+        """Сколько ячеек заведомо останутся пустыми (нижняя оценка)."""
+        by_days = sum(d.open_cells - d.max_staffed for d in self.days)
+        by_weeks = sum(max(w.open_cells - w.capacity, 0) for w in self.weeks)
+        return max(by_days, by_weeks)
+
+    @property
+    def ok(self) -> bool:
+        return self.deficit == 0
+
+    def as_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "deficit": self.deficit,
+            "days": [asdict(d) for d in self.days if d.unstaffed],
+            "weeks": [asdict(w) for w in self.weeks if w.open_cells > w.capacity],
+        }
+
+
+def max_matching(cand: List[int]) -> Tuple[int, List[Optional[int]]]:
+    """
+    Паросочетание строк (локаций) со столбцами (сотрудниками) по маскам кандидатов,
+    алгоритм Куна. Возвращает размер и для каждой строки — индекс сотрудника или None.
+    """
+    owner = {}  # сотрудник -> строка
+
+    def augment(r: int, seen: List[int]) -> bool:
+        for i in iter_bits(cand[r] & ~seen[0]):
+            if (seen[0] >> i) & 1:  # уже посещён глубже по рекурсии
+                continue
+            seen[0] |= 1 << i
+            if i not in owner or augment(owner[i], seen):
+                owner[i] = r
+                return True
+        return False
+
+    size = 0
+    for r in range(len(cand)):
+        if cand[r] and augment(r, [0]):
+            size += 1
+    row_match: List[Optional[int]] = [None] * len(cand)
+    for i, r in owner.items():
+        row_match[r] = i
+    return size, row_match
+
+
+def _hall_violator(cand: List[int], row_match: List[Optional[int]]) -> Tuple[List[int], int]:
+    """
+    Строки, достижимые чередующимися путями из незакрытых строк, и объединение их
+    кандидатов: этих сотрудников меньше, чем строк, — отсюда и дефицит.
+    """
+    owner = {i: r for r, i in enumerate(row_match) if i is not None}
+    rows = [r for r, i in enumerate(row_match) if i is None]
+    reached = set(rows)
+    pool = 0
+    while rows:
+        r = rows.pop()
+        new = cand[r] & ~pool
+        pool |= cand[r]
+        for i in iter_bits(new):
+            nxt = owner.get(i)
+            if nxt is not None and nxt not in reached:
+                reached.add(nxt)
+                rows.append(nxt)
+    return sorted(reached), pool
+
+
+def check_feasibility(problem: ScheduleProblem, matrix: Optional[EligibilityMatrix] = None) -> FeasibilityReport:
+    matrix = matrix or compile_rules(problem)
+    report = FeasibilityReport()
+    dates = problem.dates
+    names = [e.full_name for e in matrix.employees]
+
+    for wstart in range(0, len(dates), 7):
+        week_open = 0
+        days_available = [0] * len(matrix.employees)
+        for d in range(wstart, min(wstart + 7, len(dates))):
+            day = dates[d]
+            cls = day_class(day.weekday())
+            away = matrix.away[d] if matrix.away else 0
+            open_locs = [j for j, loc in enumerate(problem.locations) if problem.is_open(loc, day)]
+            cand = [matrix.allowed[j][cls] & ~away for j in open_locs]
+
+            size, row_match = max_matching(cand)
+            day_report = DayReport(date=day.isoformat(), open_cells=len(open_locs), max_staffed=size)
+            if size < len(open_locs):
+                day_report.unstaffed = [problem.locations[open_locs[r]].name
+                                        for r, i in enumerate(row_match) if i is None]
+                rows, pool = _hall_violator(cand, row_match)
+                day_report.bottleneck = Bottleneck(
+                    locations=[problem.locations[open_locs[r]].name for r in rows],
+                    candidates=[names[i] for i in iter_bits(pool)],
+                )
+            report.days.append(day_report)
+
+            week_open += len(open_locs)
+            anywhere = 0
+            for mask in cand:
+                anywhere |= mask
+            for i in iter_bits(anywhere):
+                days_available[i] += 1
+
+        report.weeks.append(WeekReport(
+            week_start=dates[wstart].isoformat(),
+            open_cells=week_open,
+            capacity=sum(min(HARD_WEEK_CAP, n) for n in days_available),
+        ))
+    return report
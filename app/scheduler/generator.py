@@ -2,48 +2,78 @@ import logging
 import random
 from collections import defaultdict
 from datetime import date, timedelta
-from typing import Optional, Dict, Set, Tuple, List
+from typing import Callable, Iterator, Optional, Dict, Tuple, List
 
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal, init_db
-from app.models import Employee, EmployeeSetting, Location, Shift
+from app.database import SessionLocal
+from app.models import (
+    ConflictPair, Employee, EmployeeRule, EmployeeSetting, Location, LocationRule, Shift, Unavailability, WeekendBan,
+)
+from app.schedule_cache import bump_schedule_version
+from app.scheduler.eligibility import compile_rules, day_class, iter_bits
+from app.scheduler.fairness import LoadHistogram
+from app.scheduler.history import load_priors
+from app.scheduler.persist import persist_solution
+from app.scheduler.problem import EmployeeRow, LocationRow, RuleSet, ScheduleProblem, ScheduleSolution, SettingRow
+from app.scheduler.state import (
+    HARD_STREAK_CAP,
+    HARD_WEEK_CAP,
+    SOFT_STREAK_TARGET,
+    SOFT_WEEK_TARGET,
+    ScheduleState,
+    frozen_cells,
+)
+from app.scheduler.stats import GenerationStats, record
 
 logger = logging.getLogger("scheduler")
 
-WEEKEND_ONLY_LOCATIONS: Set[str] = {"Луномосик", "Авиапарк", "Москвариум 3"}
-CONFLICT_PAIR: Set[str] = {"Катя Стрижкина", "Аня Стаценко"}
 
-SOFT_WEEK_TARGET = 4
-HARD_WEEK_CAP = 5
-SOFT_STREAK_TARGET = 2
-HARD_STREAK_CAP = 3
-
-SPECIAL_TARGET_SET: Set[str] = {"Москвариум 1", "Москвариум 0", "Мультпарк"}
-SPECIAL_STAFF: Dict[str, dict] = {
-    "Катя Стрижкина": {"need_target_once": True,  "need_master_once": False},
-    "Настя Губарева": {"need_target_once": True,  "need_master_once": False},
-    "Лиза Терехова":  {"need_target_once": True,  "need_master_once": False},
-    "Аня Стаценко":   {"need_target_once": True,  "need_master_once": True},
-    "Алиса Бойцова":  {"forbid_weekend": {"Москвариум 0", "Москвариум 1"}},
-}
-
-
-def can_work_setting(es: Optional[EmployeeSetting], preferred_only: bool) -> bool:
-    if preferred_only:
-        return es is not None and es.is_allowed and getattr(es, "is_preferred", False)
-    return es is None or es.is_allowed
-
-
-def violates_pair_zone(emp_name: str, zone: str, by_zone_today: Dict[str, Set[str]]) -> bool:
-    if emp_name not in CONFLICT_PAIR:
-        return False
-    others = CONFLICT_PAIR - {emp_name}
-    return any(o in by_zone_today.get(zone, set()) for o in others)
+# Правила weekend-only локаций, пар-конфликтов и обязательных выходных назначений —
+# в таблицах location_rules / employee_rules / employee_weekend_bans / employee_conflicts
+# (см. load_rules и app.seed_rules)
+
+
+def cell_penalty(es: Optional[SettingRow], w: int, s_now: int, repeat_loc: bool, total: int) -> int:
+    """Мягкий штраф за постановку сотрудника в ячейку (без случайной компоненты)."""
+    pen = 0
+    if es and getattr(es, "is_preferred", False):
+        pen -= 40
+    if w < SOFT_WEEK_TARGET:
+        pen -= (SOFT_WEEK_TARGET - w) * 25
+    if w >= SOFT_WEEK_TARGET:
+        pen += (w - SOFT_WEEK_TARGET + 1) * 30
+    if s_now >= SOFT_STREAK_TARGET:
+        pen += (s_now - SOFT_STREAK_TARGET + 1) * 35
+    if repeat_loc:
+        pen += 300  # штраф за повтор локации в одной неделе
+    pen += total
+    return pen
+
+
+def load_rules(session: Session) -> RuleSet:
+    """Правила генератора из БД — по id, без имён."""
+    loc_rules = session.query(
+        LocationRule.location_id, LocationRule.weekend_only, LocationRule.special_target, LocationRule.master_class,
+    ).all()
+    emp_rules = session.query(
+        EmployeeRule.employee_id, EmployeeRule.need_target_once, EmployeeRule.need_master_once,
+    ).all()
+    return RuleSet(
+        weekend_only_locations=frozenset(r[0] for r in loc_rules if r[1]),
+        target_locations=frozenset(r[0] for r in loc_rules if r[2]),
+        master_locations=frozenset(r[0] for r in loc_rules if r[3]),
+        need_target=frozenset(r[0] for r in emp_rules if r[1]),
+        need_master=frozenset(r[0] for r in emp_rules if r[2]),
+        weekend_bans=frozenset(tuple(r) for r in session.query(WeekendBan.employee_id, WeekendBan.location_id)),
+        conflicts=frozenset(tuple(r) for r in session.query(ConflictPair.employee_id, ConflictPair.other_id)),
+    )
 
 
 def load_data(session: Session):
-    q = session.query(Employee)
+    """Снимок сотрудников, локаций, настроек и правил в виде лёгких строк (без ORM-объектов)."""
+    q = session.query(Employee.id, Employee.full_name)
     if hasattr(Employee, "is_active"):
         q = q.filter(getattr(Employee, "is_active") == True)
     if hasattr(Employee, "is_deleted"):
@@ -52,252 +82,515 @@ def load_data(session: Session):
         q = q.filter(getattr(Employee, "role") != "helper")
     elif hasattr(Employee, "is_helper"):
         q = q.filter(getattr(Employee, "is_helper") == False)
-
-    employees: List[Employee] = q.order_by(Employee.full_name).all()
-    locations: List[Location] = session.query(Location).order_by(Location.order).all()
-    settings = session.query(EmployeeSetting).all()
-
-    settings_map: Dict[Tuple[int, int], EmployeeSetting] = {(s.employee_id, s.location_id): s for s in settings}
+    # на больничном без даты окончания — недоступен целиком; периоды — в employee_unavailability
+    q = q.filter(Employee.on_sick_leave == False)
+
+    employees: List[EmployeeRow] = [EmployeeRow(*r) for r in q.order_by(Employee.full_name)]
+    locations: List[LocationRow] = [
+        LocationRow(*r)
+        for r in session.query(Location.id, Location.name, Location.order, Location.zone).order_by(Location.order)
+    ]
+    settings: List[SettingRow] = [
+        SettingRow(*r)
+        for r in session.query(
+            EmployeeSetting.employee_id,
+            EmployeeSetting.location_id,
+            EmployeeSetting.is_allowed,
+            EmployeeSetting.is_preferred,
+        )
+    ]
+
+    settings_map: Dict[Tuple[int, int], SettingRow] = {(s.employee_id, s.location_id): s for s in settings}
 
     by_emp_allowed: Dict[int, List[int]] = defaultdict(list)
     for s in settings:
         if s.is_allowed:
             by_emp_allowed[s.employee_id].append(s.location_id)
 
-    loc_by_id = {l.id: l for l in locations}
+    rules = load_rules(session)
+    loc_ids = {l.id for l in locations}
     weekend_only_emp: Dict[int, bool] = {}
     for e in employees:
-        ids = by_emp_allowed.get(e.id, [])
-        if not ids:
-            weekend_only_emp[e.id] = False
-            continue
-        names = {loc_by_id[i].name for i in ids if i in loc_by_id}
-        weekend_only_emp[e.id] = all(n in WEEKEND_ONLY_LOCATIONS for n in names)
+        ids = [i for i in by_emp_allowed.get(e.id, []) if i in loc_ids]
+        weekend_only_emp[e.id] = bool(ids) and all(i in rules.weekend_only_locations for i in ids)
 
     logger.info("Data loaded: employees=%d, locations=%d, settings=%d", len(employees), len(locations), len(settings))
-    return employees, settings_map, locations, weekend_only_emp
-
-
-def balance_schedule(session: Session, employees: List[Employee], locations: List[Location], start: date, weeks: int):
-    """Перераспределяем смены, чтобы у всех было минимум 2 за неделю."""
-    for week_idx in range(weeks):
-        week_start = start + timedelta(days=week_idx * 7)
-        week_end = week_start + timedelta(days=6)
-
-        shifts = session.query(Shift).filter(
-            Shift.date >= week_start,
-            Shift.date <= week_end,
-            Shift.status == "draft"
-        ).all()
-
-        shifts_by_emp = defaultdict(list)
-        for s in shifts:
-            shifts_by_emp[s.employee_id].append(s)
-
-        low = [emp for emp in employees if len(shifts_by_emp.get(emp.id, [])) < 2]
-        high = [emp for emp in employees if len(shifts_by_emp.get(emp.id, [])) > 4]
-
-        if not low or not high:
+    return employees, settings_map, locations, weekend_only_emp, rules
+
+
+BALANCE_MIN_WEEK = 2
+BALANCE_MAX_WEEK = 4
+
+
+def _balance_week(state, week_idx: int, frozen: set) -> Tuple[list, list, List[Tuple[int, int]]]:
+    """
+    Одна неделя балансировки по ScheduleState: у «перегруженных» (> BALANCE_MAX_WEEK)
+    забираем по смене для «недогруженных» (< BALANCE_MIN_WEEK). Ход принимается,
+    только если state.can_place разрешает его новому сотруднику (настройки, weekend-only,
+    запреты выходных, недоступность, конфликтные пары в зоне, лимиты недели и серии);
+    обязательные выходные смены (frozen) не трогаются. Сетка меняется на месте.
+    Возвращает (low, high, moved) — индексы сотрудников и переписанные ячейки (d, j).
+    """
+    load = state.load
+    n_days = len(state.week_of)
+    days = range(week_idx * 7, min(week_idx * 7 + 7, n_days))
+    low = [i for i in range(len(state.employees)) if load[(i, week_idx)] < BALANCE_MIN_WEEK]
+    high = [i for i in range(len(state.employees)) if load[(i, week_idx)] > BALANCE_MAX_WEEK]
+    moved = []
+    if not low or not high:
+        return low, high, moved
+
+    for poor in low:
+        for rich in high:
+            if load[(poor, week_idx)] >= BALANCE_MIN_WEEK:
+                break
+            if load[(rich, week_idx)] <= BALANCE_MAX_WEEK:
+                continue
+            for d in days:
+                j = state.where.get((rich, d))
+                if j is None or (d, j) in frozen:
+                    continue
+                state.unplace(rich, d, j)
+                if state.can_place(poor, d, j):
+                    state.place(poor, d, j)
+                    moved.append((d, j))
+                    break
+                state.place(rich, d, j)
+
+    return low, high, moved
+
+
+def _balance(problem: ScheduleProblem, solution: ScheduleSolution) -> List[Tuple[int, int]]:
+    state = ScheduleState(problem, solution)
+    frozen = frozen_cells(state.matrix, solution)
+    names = [e.full_name for e in state.employees]
+    moved_all = []
+    for week_idx in range((len(solution.dates) + 6) // 7):
+        low, high, moved = _balance_week(state, week_idx, frozen)
+        moved_all.extend(moved)
+        if low and high:
+            logger.info("Balance done for week %d: low=%s, high=%s, moved=%d",
+                        week_idx + 1,
+                        [names[i] for i in low],
+                        [names[i] for i in high],
+                        len(moved))
+    return moved_all
+
+
+def balance_assignments(problem: ScheduleProblem, solution: ScheduleSolution) -> int:
+    """Перераспределяем смены в сетке, чтобы у всех было минимум 2 за неделю."""
+    return len(_balance(problem, solution))
+
+
+def draft_window_statement(start: date, end: date):
+    return select(Shift.id, Shift.date, Shift.location_id, Shift.employee_id).where(
+        Shift.date >= start,
+        Shift.date <= end,
+        Shift.status == Shift.STATUS_DRAFT,
+    )
+
+
+def balance_schedule(session: Session, problem: ScheduleProblem) -> int:
+    """
+    То же для уже записанных черновиков окна problem: снимок (сотрудники,
+    настройки, правила) берётся из problem без повторной загрузки, из БД —
+    один SELECT черновиков, балансировка в памяти с теми же проверками
+    и один пакетный UPDATE. Коммит — на стороне вызывающего.
+    """
+    dates = problem.dates
+    rows = session.execute(draft_window_statement(dates[0], dates[-1])).all()
+
+    solution = ScheduleSolution.empty(problem)
+    day_pos = {d: i for i, d in enumerate(solution.dates)}
+    loc_pos = {l.id: j for j, l in enumerate(problem.locations)}
+    shift_ids = {}
+    for shift_id, d, loc_id, emp_id in rows:
+        j = loc_pos.get(loc_id)
+        if j is None:
             continue
+        shift_ids[(day_pos[d], j)] = shift_id
+        solution.grid[day_pos[d]][j] = emp_id
+
+    updates = [
+        {"id": shift_ids[(d, j)], "employee_id": solution.grid[d][j]}
+        for d, j in _balance(problem, solution)
+    ]
+    if updates:
+        session.execute(update(Shift), updates)
+    return len(updates)
+
+
+def unavailability_statement(start: date, end: date):
+    return select(Unavailability.employee_id, Unavailability.start_date, Unavailability.end_date).where(
+        Unavailability.end_date >= start,
+        Unavailability.start_date <= end,
+    ).order_by(Unavailability.employee_id, Unavailability.start_date)
+
+
+def load_unavailability(session: Session, start: date, end: date) -> Tuple[Tuple[int, date, date], ...]:
+    """Периоды недоступности, пересекающие [start, end], отсортированные по сотруднику и дате."""
+    return tuple(tuple(r) for r in session.execute(unavailability_statement(start, end)))
+
+
+def load_problem(session: Session, start: date, weeks: int = 2) -> ScheduleProblem:
+    employees, settings_map, locations, weekend_only_emp, rules = load_data(session)
+    return ScheduleProblem(
+        start=start,
+        weeks=weeks,
+        employees=tuple(employees),
+        locations=tuple(locations),
+        settings_map=settings_map,
+        weekend_only_emp=weekend_only_emp,
+        rules=rules,
+        unavailability=load_unavailability(session, start, start + timedelta(days=weeks * 7 - 1)),
+        # нагрузка прошлых недель из employee_week_load — справедливость между окнами
+        prior_totals=load_priors(session, start, [e.id for e in employees]),
+    )
+
+
+SOLVER_GREEDY = "greedy"
+SOLVER_MATCHING = "matching"
+
+
+def streak_mask(matrix, streaks: Dict[int, int]) -> int:
+    """Маска сотрудников, чья серия уже упёрлась в HARD_STREAK_CAP."""
+    mask = 0
+    for emp_id, s in streaks.items():
+        i = matrix.emp_index.get(emp_id)
+        if i is not None and s >= HARD_STREAK_CAP:
+            mask |= 1 << i
+    return mask
+
+
+def carry_over(problem: ScheduleProblem, solution: ScheduleSolution) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Состояние, которое следующая неделя наследует от этой:
+    серия дней подряд на последний день сетки и накопленное число смен.
+    """
+    worked = defaultdict(set)
+    totals = defaultdict(int, problem.prior_totals)
+    for d, row in enumerate(solution.grid):
+        for emp_id in row:
+            if emp_id is not None:
+                worked[emp_id].add(d)
+                totals[emp_id] += 1
+
+    last = len(solution.dates) - 1
+    streaks = {}
+    for emp in problem.employees:
+        days = worked.get(emp.id, ())
+        n = 0
+        while n <= last and (last - n) in days:
+            n += 1
+        streaks[emp.id] = n + problem.prior_streak.get(emp.id, 0) if n > last else n
+    return streaks, dict(totals)
+
+
+def solve(problem: ScheduleProblem, rng=None, solver: str = SOLVER_GREEDY,
+          stats: Optional[GenerationStats] = None) -> ScheduleSolution:
+    """
+    Чистый солвер: по снимку задачи строит сетку назначений, не трогая БД.
+    rng — источник случайности (random.Random); по умолчанию модуль random.
+    solver — имя из реестра app.scheduler.solvers: "greedy" (solve_greedy),
+    "matching" (назначение на каждый день целиком) или подключённый движок.
+    stats — куда сложить счётчики кандидатов, пустых ячеек и т.п.
+    """
+    from app.scheduler.solvers import get_solver
+    return get_solver(solver)(problem, rng=rng, stats=stats)
+
+
+def solve_greedy(problem: ScheduleProblem, rng=None, stats: Optional[GenerationStats] = None) -> ScheduleSolution:
+    """Жадный солвер: локации в порядке Location.order, выходные дни недели — первыми."""
+    rng = rng if rng is not None else random
+    start = problem.start
+    employees = problem.employees
+    locations = problem.locations
+    settings_map = problem.settings_map
+    weekend_only_emp = problem.weekend_only_emp
+
+    solution = ScheduleSolution.empty(problem)
+    dates = solution.dates
+    total_days = len(dates)
+    day_pos = {d: i for i, d in enumerate(dates)}
+
+    matrix = compile_rules(problem)
+
+    week_count = defaultdict(int)
+    total_2w = defaultdict(int, problem.prior_totals)
+    prev_streak = defaultdict(int, problem.prior_streak)
+    used_loc_week = defaultdict(set)
+    # маски сотрудников, уже отработавших обязательное выходное назначение в неделе
+    target_done = defaultdict(int)
+    master_done = defaultdict(int)
+
+    # маски «уже нельзя»: выбран лимит недели / лимит серии подряд
+    week_capped_mask = defaultdict(int)
+    streak_capped_mask = streak_mask(matrix, prev_streak)
+
+    # счётчики копим в локальных переменных, в stats — один раз в конце
+    candidates_evaluated = preferred_fallbacks = empty_cells = special_overrides = 0
+    pool_sizes = defaultdict(int)
+
+    for wstart in range(0, total_days, 7):
+        week_dates = dates[wstart:wstart + 7]
+        sorted_week_dates = sorted(week_dates, key=lambda d: 0 if d.weekday() in (5, 6) else 1)
+        week_load = LoadHistogram(matrix.full & ~matrix.weekend_only)
+
+        for day in sorted_week_dates:
+            week_idx = (day - start).days // 7
+            weekday = day.weekday()
+            cls = day_class(weekday)
+
+            assigned_today_ids = set()
+            assigned_today_mask = matrix.away[day_pos[day]]  # недоступные — как уже занятые
+            zone_block_mask = defaultdict(int)
+
+            for loc_idx, loc in enumerate(locations):
+                if matrix.closed_weekdays[loc_idx] and weekday not in (5, 6):
+                    continue
+
+                zone = loc.zone
+                chosen_emp = None
+                blocked = (assigned_today_mask | streak_capped_mask
+                           | week_capped_mask[week_idx] | zone_block_mask[zone])
+
+                for preferred_pass in (True, False):
+                    if chosen_emp is not None:
+                        break
+                    if not preferred_pass:
+                        preferred_fallbacks += 1
 
-        for poor in low:
-            for rich in high:
-                if len(shifts_by_emp.get(poor.id, [])) >= 2:
-                    break
-                for s in list(shifts_by_emp.get(rich.id, [])):
-                    # Проверка: может ли poor работать на этой локации
-                    loc = next((l for l in locations if l.id == s.location_id), None)
-                    if not loc:
-                        continue
-                    es = session.query(EmployeeSetting).filter_by(employee_id=poor.id, location_id=loc.id).first()
-                    if es and not es.is_allowed:
+                    mask = matrix.candidates(loc_idx, cls, preferred_pass) & ~blocked
+                    if not mask:
                         continue
-                    # Заменяем rich на poor
-                    s.employee_id = poor.id
-                    shifts_by_emp[rich.id].remove(s)
-                    shifts_by_emp[poor.id].append(s)
-                    break
-
-        logger.info("Balance done for week %d: low=%s, high=%s",
-                    week_idx + 1,
-                    [e.full_name for e in low],
-                    [e.full_name for e in high])
 
-
-def generate_schedule(start: date, weeks: int = 2, persist: bool = True):
-    logger.info("generate_schedule: start=%s weeks=%s persist=%s", start.isoformat(), weeks, persist)
-    init_db()
+                    # в будни при разбросе нагрузки > 1 берём только тех, кто на минимуме
+                    if weekday not in (5, 6) and week_load.spread() > 1:
+                        mask_min = mask & week_load.at_min()
+                        if mask_min:
+                            mask = mask_min
+
+                    pool = []
+                    for i in iter_bits(mask):
+                        emp = employees[i]
+                        pool.append((emp, settings_map.get((emp.id, loc.id)),
+                                     week_count[(emp.id, week_idx)], prev_streak[emp.id]))
+                    candidates_evaluated += len(pool)
+                    pool_sizes[len(pool)] += 1
+
+                    if weekday in (5, 6):
+                        if matrix.master_loc[loc_idx]:
+                            due = mask & matrix.need_master & ~master_done[week_idx]
+                            if due:
+                                i = (due & -due).bit_length() - 1
+                                chosen_emp = employees[i]
+                                master_done[week_idx] |= 1 << i
+                                special_overrides += 1
+
+                        if chosen_emp is None and matrix.target_loc[loc_idx]:
+                            due = mask & matrix.need_target & ~target_done[week_idx]
+                            if due:
+                                i = (due & -due).bit_length() - 1
+                                chosen_emp = employees[i]
+                                target_done[week_idx] |= 1 << i
+                                special_overrides += 1
+
+                    if chosen_emp is None:
+                        def soft_ok(item) -> bool:
+                            emp, es, w, s_now = item
+                            if weekday not in (5, 6) and weekend_only_emp.get(emp.id, False):
+                                return False
+                            return (w < SOFT_WEEK_TARGET) and (s_now < SOFT_STREAK_TARGET)
+
+                        soft_pool = [it for it in pool if soft_ok(it)]
+                        use_pool = soft_pool if soft_pool else pool
+                        rng.shuffle(use_pool)
+
+                        def score(item) -> int:
+                            emp, es, w, s_now = item
+                            pen = cell_penalty(es, w, s_now,
+                                               loc.id in used_loc_week[(emp.id, week_idx)],
+                                               total_2w[emp.id])
+                            pen += rng.randint(0, 99)  # расширили разброс случайной компоненты
+                            return pen
+
+                        # выбираем минимум, но если несколько с одинаковым score — случайный из лучших
+                        scored_pool = [(score(it), it) for it in use_pool]
+                        min_score = min(s for s, _ in scored_pool)
+                        best = [it for s, it in scored_pool if s == min_score]
+                        chosen_emp = rng.choice(best)[0]
+
+                if chosen_emp is None:
+                    empty_cells += 1
+                else:
+                    solution.grid[day_pos[day]][loc_idx] = chosen_emp.id
+
+                    chosen_idx = matrix.emp_index[chosen_emp.id]
+                    assigned_today_ids.add(chosen_emp.id)
+                    assigned_today_mask |= 1 << chosen_idx
+                    zone_block_mask[zone] |= matrix.conflict[chosen_idx]
+                    week_load.bump(chosen_idx, week_count[(chosen_emp.id, week_idx)])
+                    week_count[(chosen_emp.id, week_idx)] += 1
+                    if week_count[(chosen_emp.id, week_idx)] >= HARD_WEEK_CAP:
+                        week_capped_mask[week_idx] |= 1 << chosen_idx
+                    total_2w[chosen_emp.id] += 1
+                    used_loc_week[(chosen_emp.id, week_idx)].add(loc.id)
+
+            new_streak = defaultdict(int)
+            streak_capped_mask = 0
+            for i, e in enumerate(employees):
+                new_streak[e.id] = (prev_streak[e.id] + 1) if (e.id in assigned_today_ids) else 0
+                if new_streak[e.id] >= HARD_STREAK_CAP:
+                    streak_capped_mask |= 1 << i
+            prev_streak = new_streak
+
+    if stats is not None:
+        stats.candidates_evaluated += candidates_evaluated
+        stats.preferred_fallbacks += preferred_fallbacks
+        stats.empty_cells += empty_cells
+        stats.special_overrides += special_overrides
+        for size, n in pool_sizes.items():
+            stats.pool_sizes[size] = stats.pool_sizes.get(size, 0) + n
+    return solution
+
+
+def run_pipeline(problem: ScheduleProblem, rng=None, solver: str = SOLVER_GREEDY,
+                 improve_seconds: float = 0.0, seed: Optional[int] = None,
+                 stats: Optional[GenerationStats] = None) -> ScheduleSolution:
+    """
+    Солвер -> балансировка -> (опционально) локальный поиск, без БД.
+    Если задан seed, rng создаётся из него и прогон воспроизводим
+    (при improve_seconds > 0 — с точностью до числа итераций отжига).
+    Таймеры фаз и счётчики прогона — в solution.stats.
+    """
+    if seed is not None:
+        rng = random.Random(seed)
+    if stats is None:
+        stats = GenerationStats(start=problem.start.isoformat(), weeks=problem.weeks, solver=solver)
+    stats.seed = seed
+
+    with stats.timer("construction"):
+        solution = solve(problem, rng=rng, solver=solver, stats=stats)
+    solution.seed = seed
+    solution.stats = stats
+    with stats.timer("balance"):
+        balance_assignments(problem, solution)
+    if improve_seconds > 0:
+        from app.scheduler.improve import improve
+        with stats.timer("improve"):
+            result = improve(problem, solution, improve_seconds, rng=rng)
+        logger.info("improve: %s", result)
+    stats.filled_cells = solution.filled()
+    return solution
+
+
+def generate_schedule(start: date, weeks: int = 2, persist: bool = True, rng=None,
+                      solver: Optional[str] = None, improve_seconds: float = 0.0,
+                      seed: Optional[int] = None, starts: int = 1, decompose: bool = False,
+                      progress: Optional[Callable[[str], None]] = None):
+    """
+    Снимок БД -> солвер -> (опционально) локальный поиск -> запись черновика.
+    improve_seconds > 0 включает доулучшение сетки отжигом в пределах бюджета.
+    starts > 1 запускает столько независимых прогонов в пуле процессов
+    и сохраняет лучший по schedule_cost (см. app.scheduler.multistart).
+    decompose=True решает зоны параллельно и сводит их глобальной сверкой
+    (см. app.scheduler.decompose); starts и improve_seconds при этом не используются.
+    Возвращает (solution, dates); при persist=False БД не изменяется.
+    Таймеры фаз и счётчики — в solution.stats (и в /admin/metrics/generator).
+    progress(phase) вызывается при смене фазы: "load", "solve", "persist".
+    solver=None — движок по умолчанию (SCHEDULER_SOLVER, см. app.scheduler.solvers).
+    """
+    from app.scheduler.solvers import default_solver
+    solver = solver or default_solver()
+    logger.info("generate_schedule: start=%s weeks=%s persist=%s solver=%s seed=%s starts=%s decompose=%s",
+                start.isoformat(), weeks, persist, solver, seed, starts, decompose)
     session = SessionLocal()
     try:
-        employees, settings_map, locations, weekend_only_emp = load_data(session)
-
-        total_days = weeks * 7
-        dates = [start + timedelta(days=i) for i in range(total_days)]
+        if progress:
+            progress("load")
+        load_timer = GenerationStats()
+        with load_timer.timer("load_data"):
+            problem = load_problem(session, start, weeks)
+        from app.scheduler.feasibility import check_feasibility
+        with load_timer.timer("feasibility"):
+            feasibility = check_feasibility(problem)
+        if not feasibility.ok:
+            logger.warning("generate_schedule: %d cells cannot be staffed: %s",
+                           feasibility.deficit, feasibility.as_dict())
+
+        if progress:
+            progress("solve")
+        if decompose:
+            from app.scheduler.decompose import solve_decomposed
+            solution = solve_decomposed(problem, solver=solver, seed=seed)
+        elif starts > 1:
+            from app.scheduler.multistart import solve_multistart
+            with load_timer.timer("multistart"):
+                solution = solve_multistart(problem, starts, seed=seed, solver=solver,
+                                            improve_seconds=improve_seconds)
+        else:
+            solution = run_pipeline(problem, rng=rng, solver=solver,
+                                    improve_seconds=improve_seconds, seed=seed)
+        stats = solution.stats
+        stats.phases.update(load_timer.phases)
+        stats.feasibility_deficit = feasibility.deficit
 
         if persist:
-            session.query(Shift).filter(
-                Shift.date >= dates[0],
-                Shift.date <= dates[-1],
-                Shift.status == "draft",
-            ).delete(synchronize_session=False)
-            session.commit()
-
-        week_count = defaultdict(int)
-        total_2w = defaultdict(int)
-        prev_streak = defaultdict(int)
-        used_loc_week = defaultdict(set)
-        special_done_target = defaultdict(set)
-        special_done_master = defaultdict(set)
-
-        total_created = 0
-
-        for wstart in range(0, total_days, 7):
-            week_dates = dates[wstart:wstart + 7]
-            sorted_week_dates = sorted(week_dates, key=lambda d: 0 if d.weekday() in (5, 6) else 1)
-
-            for day in sorted_week_dates:
-                week_idx = (day - start).days // 7
-                weekday = day.weekday()
-
-                assigned_today_ids = set()
-                assigned_by_zone_today = defaultdict(set)
-
-                for loc in locations:
-                    if loc.name in WEEKEND_ONLY_LOCATIONS and weekday not in (5, 6):
-                        continue
+            if progress:
+                progress("persist")
+            persist_solution(session, solution, status=Shift.STATUS_DRAFT, stats=stats)
+            bump_schedule_version(session)
+            with stats.timer("commit"):
+                session.commit()
 
-                    zone = loc.zone
-                    chosen_emp = None
-
-                    for preferred_pass in (True, False):
-                        if chosen_emp is not None:
-                            break
-
-                        pool = []
-                        for emp in employees:
-                            es = settings_map.get((emp.id, loc.id))
-                            if not can_work_setting(es, preferred_only=preferred_pass):
-                                continue
-                            if weekday not in (5, 6) and weekend_only_emp.get(emp.id, False):
-                                continue
-                            if weekday in (5, 6):
-                                rules = SPECIAL_STAFF.get(emp.full_name, {})
-                                if loc.name in rules.get("forbid_weekend", set()):
-                                    continue
-                            if emp.id in assigned_today_ids:
-                                continue
-                            if violates_pair_zone(emp.full_name, zone, assigned_by_zone_today):
-                                continue
-
-                            w = week_count[(emp.id, week_idx)]
-                            s_now = prev_streak[emp.id]
-                            if w >= HARD_WEEK_CAP or s_now >= HARD_STREAK_CAP:
-                                continue
-
-                            pool.append((emp, es, w, s_now))
-
-                        if not pool:
-                            continue
-
-                        if weekday not in (5, 6):
-                            regular_counts = [week_count[(e.id, week_idx)]
-                                               for e in employees
-                                               if not weekend_only_emp.get(e.id, False)]
-                            if regular_counts:
-                                min_w = min(regular_counts)
-                                max_w = max(regular_counts)
-                                if max_w - min_w > 1:
-                                    pool_min = [it for it in pool
-                                                if not weekend_only_emp.get(it[0].id, False)
-                                                and week_count[(it[0].id, week_idx)] == min_w]
-                                    if pool_min:
-                                        pool = pool_min
-
-                        if weekday in (5, 6):
-                            if (loc.name == "Мастер классы"
-                                and SPECIAL_STAFF.get("Аня Стаценко", {}).get("need_master_once")
-                                and week_idx not in special_done_master["Аня Стаценко"]):
-                                cand = next((e for (e, es, w, s) in pool if e.full_name == "Аня Стаценко"), None)
-                                if cand:
-                                    chosen_emp = cand
-                                    special_done_master["Аня Стаценко"].add(week_idx)
-
-                            if chosen_emp is None and loc.name in SPECIAL_TARGET_SET:
-                                for name, rules in SPECIAL_STAFF.items():
-                                    if not rules.get("need_target_once"):
-                                        continue
-                                    if week_idx in special_done_target[name]:
-                                        continue
-                                    cand = next((e for (e, es, w, s) in pool if e.full_name == name), None)
-                                    if cand:
-                                        chosen_emp = cand
-                                        special_done_target[name].add(week_idx)
-                                        break
-
-                        if chosen_emp is None:
-                            def soft_ok(item) -> bool:
-                                emp, es, w, s_now = item
-                                if weekday not in (5, 6) and weekend_only_emp.get(emp.id, False):
-                                    return False
-                                return (w < SOFT_WEEK_TARGET) and (s_now < SOFT_STREAK_TARGET)
-
-                            soft_pool = [it for it in pool if soft_ok(it)]
-                            use_pool = soft_pool if soft_pool else pool
-                            random.shuffle(use_pool)
-
-                            def score(item) -> int:
-                                emp, es, w, s_now = item
-                                pen = 0
-                                if es and getattr(es, "is_preferred", False):
-                                    pen -= 40
-                                if w < SOFT_WEEK_TARGET:
-                                    pen -= (SOFT_WEEK_TARGET - w) * 25
-                                if w >= SOFT_WEEK_TARGET:
-                                    pen += (w - SOFT_WEEK_TARGET + 1) * 30
-                                if s_now >= SOFT_STREAK_TARGET:
-                                    pen += (s_now - SOFT_STREAK_TARGET + 1) * 35
-                                if loc.id in used_loc_week[(emp.id, week_idx)]:
-                                    pen += 300  # штраф за повтор локации в одной неделе
-                                pen += total_2w[emp.id]
-                                pen += random.randint(0, 99)  # расширили разброс случайной компоненты
-                                return pen
-
-                            # выбираем минимум, но если несколько с одинаковым score — случайный из лучших
-                            scored_pool = [(score(it), it) for it in use_pool]
-                            min_score = min(s for s, _ in scored_pool)
-                            best = [it for s, it in scored_pool if s == min_score]
-                            chosen_emp = random.choice(best)[0]
-
-                    if chosen_emp is not None:
-                        if persist:
-                            session.add(Shift(
-                                location_id=loc.id,
-                                date=day,
-                                employee_id=chosen_emp.id,
-                                status="draft",
-                            ))
-                            total_created += 1
-
-                        assigned_today_ids.add(chosen_emp.id)
-                        assigned_by_zone_today[zone].add(chosen_emp.full_name)
-                        week_count[(chosen_emp.id, week_idx)] += 1
-                        total_2w[chosen_emp.id] += 1
-                        used_loc_week[(chosen_emp.id, week_idx)].add(loc.id)
-
-                new_streak = defaultdict(int)
-                for e in employees:
-                    new_streak[e.id] = (prev_streak[e.id] + 1) if (e.id in assigned_today_ids) else 0
-                prev_streak = new_streak
-
-        if persist:
-            balance_schedule(session, employees, locations, start, weeks)
-            session.commit()
-            return None, dates
-        else:
-            return [], dates
+        record(stats)
+        logger.info("generate_schedule done: %s", stats.as_dict())
+        return solution, solution.dates
 
     except Exception:
+        session.rollback()
         logger.exception("generate_schedule failed")
         raise
     finally:
         session.close()
+
+
+def generate_streaming(start: date, weeks: int, solver: Optional[str] = None, seed: Optional[int] = None,
+                       rng=None) -> Iterator[ScheduleSolution]:
+    """
+    Длинный горизонт по одной неделе: решаем неделю, пишем её черновик и сразу коммитим,
+    затем отдаём сетку недели вызывающему. Между неделями переносится только
+    carry_over (серии и накопленные смены), поэтому память не растёт с горизонтом,
+    а сбой на неделе N откатывает только её — недели 1..N-1 уже в БД.
+    """
+    from app.scheduler.solvers import default_solver
+    solver = solver or default_solver()
+    if seed is not None:
+        rng = random.Random(seed)
+    logger.info("generate_streaming: start=%s weeks=%s solver=%s seed=%s",
+                start.isoformat(), weeks, solver, seed)
+    session = SessionLocal()
+    try:
+        # периоды недоступности — сразу на весь горизонт, решаем по одной неделе
+        problem = load_problem(session, start, weeks)
+        problem.weeks = 1
+        for week in range(weeks):
+            problem.start = start + timedelta(weeks=week)
+            try:
+                solution = run_pipeline(problem, rng=rng, solver=solver)
+                stats = solution.stats
+                stats.seed = seed
+                persist_solution(session, solution, status=Shift.STATUS_DRAFT, stats=stats)
+                bump_schedule_version(session)
+                with stats.timer("commit"):
+                    session.commit()
+            except Exception:
+                session.rollback()
+                logger.exception("generate_streaming failed at week %d (%s)", week + 1,
+                                 problem.start.isoformat())
+                raise
+            record(stats)
+            problem.prior_streak, problem.prior_totals = carry_over(problem, solution)
+            yield solution
+    finally:
+        session.close()
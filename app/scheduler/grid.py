@@ -0,0 +1,94 @@
+"""
+Read-модель страницы графика.
+
+Вся 14-дневная сетка (локации, назначения черновика и публикации, флаги окна)
+строится одним запросом: locations LEFT JOIN shifts (по окну и статусам,
+индекс ix_shifts_status_date) LEFT JOIN employees, только нужные столбцы.
+Ни ORM-объектов, ни ленивых s.employee — флаги has_draft / has_any_current /
+has_any_next считаются по тем же строкам в памяти.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from app.models import Employee, Location, Shift
+
+VISIBLE_STATUSES = (Shift.STATUS_DRAFT, Shift.STATUS_PUBLISHED)
+
+
+@dataclass
+class ScheduleGrid:
+    start: date
+    dates: List[date]
+    locations: List[Tuple[int, str]] = field(default_factory=list)  # (id, name) в порядке Location.order
+    cells: Dict[str, Dict[Tuple[int, date], str]] = field(default_factory=dict)  # статус -> (loc_id, day) -> ФИО
+    next_week_used: bool = False
+
+    @property
+    def has_draft(self) -> bool:
+        return bool(self.cells.get(Shift.STATUS_DRAFT))
+
+    @property
+    def has_any_current(self) -> bool:
+        return any(self.cells.values())
+
+    @property
+    def has_any_next(self) -> bool:
+        return self.next_week_used
+
+    @property
+    def locations_map(self) -> Dict[str, int]:
+        return {name: loc_id for loc_id, name in self.locations}
+
+    def basis_status(self, admin: bool) -> str:
+        """Админ видит черновик, если он есть; остальные — только публикацию."""
+        if admin and self.has_draft:
+            return Shift.STATUS_DRAFT
+        return Shift.STATUS_PUBLISHED
+
+    def table(self, status: str) -> Dict[str, List[str]]:
+        idx = self.cells.get(status, {})
+        return {name: [idx.get((loc_id, d), "") for d in self.dates] for loc_id, name in self.locations}
+
+
+def grid_statement(first: date, last: date):
+    return (
+        select(Location.id, Location.name, Shift.date, Shift.status, Employee.full_name)
+        .outerjoin(Shift, and_(
+            Shift.location_id == Location.id,
+            Shift.date >= first,
+            Shift.date <= last,
+            Shift.status.in_(VISIBLE_STATUSES),
+        ))
+        .outerjoin(Employee, Employee.id == Shift.employee_id)
+        .order_by(Location.order, Location.id)
+    )
+
+
+def load_schedule_grid(session: Session, start: date, days: int = 14) -> ScheduleGrid:
+    dates = [start + timedelta(i) for i in range(days)]
+    grid = ScheduleGrid(start=start, dates=dates)
+    next_start = start + timedelta(days=7)
+    next_end = next_start + timedelta(days=6)
+    last = max(dates[-1], next_end)
+
+    seen = set()
+    for loc_id, loc_name, day, status, full_name in session.execute(grid_statement(start, last)):
+        if loc_id not in seen:
+            seen.add(loc_id)
+            grid.locations.append((loc_id, loc_name))
+        if day is None:
+            continue
+        if next_start <= day <= next_end:
+            grid.next_week_used = True
+        if day <= dates[-1]:
+            grid.cells.setdefault(status, {})[(loc_id, day)] = full_name or ""
+    return grid
+
+
+def employee_options(session: Session):
+    """(id, full_name) для выпадающих списков админа — без загрузки ORM-объектов."""
+    return session.execute(select(Employee.id, Employee.full_name).order_by(Employee.full_name)).all()
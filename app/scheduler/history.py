@@ -0,0 +1,86 @@
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import EmployeeWeekLoad, Shift
+
+logger = logging.getLogger("scheduler")
+
+# Какие смены считаются отработанной нагрузкой (черновики — нет)
+COUNTED_STATUSES = (Shift.STATUS_PUBLISHED, "archived")
+# Сколько прошлых недель учитывается как приор справедливости
+HISTORY_WEEKS = 4
+
+
+def _monday(d: date) -> date:
+    return d - timedelta(days=d.weekday())
+
+
+def week_load_statement(first: date, last: date):
+    return select(Shift.employee_id, Shift.date, func.count()).where(
+        Shift.status.in_(COUNTED_STATUSES),
+        Shift.employee_id.isnot(None),
+        Shift.date >= first,
+        Shift.date <= last,
+    ).group_by(Shift.employee_id, Shift.date)
+
+
+def refresh_week_load(session: Session, start: date, end: date) -> int:
+    """
+    Пересчитывает employee_week_load для недель, задевающих [start, end],
+    по сменам только этих недель. Вызывать в той же транзакции, что и
+    изменение смен (публикация, сохранение, rollover, ремонт); коммит — у вызывающего.
+    """
+    first = _monday(start)
+    last = _monday(end) + timedelta(days=6)
+
+    counts: Dict[tuple, int] = defaultdict(int)
+    for emp_id, d, n in session.execute(week_load_statement(first, last)):
+        counts[(emp_id, _monday(d))] += n
+
+    session.execute(delete(EmployeeWeekLoad).where(
+        EmployeeWeekLoad.week_start >= first,
+        EmployeeWeekLoad.week_start <= last,
+    ))
+    if counts:
+        session.execute(insert(EmployeeWeekLoad), [
+            {"employee_id": emp_id, "week_start": week, "shifts": n}
+            for (emp_id, week), n in counts.items()
+        ])
+    return len(counts)
+
+
+def load_priors(session: Session, before: date, employee_ids: Iterable[int],
+                weeks: int = HISTORY_WEEKS) -> Dict[int, int]:
+    """
+    Нагрузка сотрудников за weeks недель до before — одним запросом по индексу week_start.
+    Возвращается относительно минимума: солверу важна разница, а не абсолютный стаж.
+    """
+    since = _monday(before) - timedelta(weeks=weeks)
+    totals = dict(session.query(EmployeeWeekLoad.employee_id, func.sum(EmployeeWeekLoad.shifts)).filter(
+        EmployeeWeekLoad.week_start >= since,
+        EmployeeWeekLoad.week_start < _monday(before),
+    ).group_by(EmployeeWeekLoad.employee_id).all())
+    priors = {emp_id: int(totals.get(emp_id) or 0) for emp_id in employee_ids}
+    if not priors:
+        return {}
+    floor = min(priors.values())
+    return {emp_id: n - floor for emp_id, n in priors.items() if n > floor}
+
+
+def backfill_week_load(session: Session) -> int:
+    """Первичное заполнение из истории shifts, если таблица ещё пуста. Коммит — у вызывающего."""
+    if session.query(EmployeeWeekLoad.employee_id).first() is not None:
+        return 0
+    first, last = session.query(func.min(Shift.date), func.max(Shift.date)).filter(
+        Shift.status.in_(COUNTED_STATUSES),
+    ).one()
+    if first is None:
+        return 0
+    n = refresh_week_load(session, first, last)
+    logger.info("employee_week_load backfilled: %d rows (%s..%s)", n, first, last)
+    return n
@@ -0,0 +1,129 @@
+import math
+import random
+import time
+from typing import Optional
+
+from app.scheduler.eligibility import iter_bits
+from app.scheduler.problem import ScheduleProblem, ScheduleSolution
+from app.scheduler.state import ScheduleState, frozen_cells
+
+T_START = 100.0
+T_END = 1.0
+
+
+def schedule_cost(problem: ScheduleProblem, solution: ScheduleSolution) -> int:
+    """Глобальная целевая функция сетки (меньше — лучше); сетка не меняется."""
+    copy = ScheduleSolution(solution.start, solution.dates, solution.location_ids,
+                            [row[:] for row in solution.grid])
+    return ScheduleState(problem, copy).cost
+
+
+def improve(problem: ScheduleProblem, solution: ScheduleSolution, seconds: float,
+            rng=None, max_iterations: Optional[int] = None) -> dict:
+    """
+    Имитация отжига по сетке за бюджет seconds (или max_iterations шагов —
+    для воспроизводимости). Ходы: заполнение пустой ячейки, замена сотрудника,
+    обмен двух сотрудников в один день и обмен ячейками между днями.
+    Жёсткие ограничения не нарушаются; сетка меняется на месте.
+    """
+    rng = rng if rng is not None else random
+    state = ScheduleState(problem, solution)
+    grid = state.grid
+    emp_index = state.matrix.emp_index
+    frozen = frozen_cells(state.matrix, solution)
+    cells = [c for c in state.open_cells if c not in frozen]
+    candidates = {
+        (j, cls): list(iter_bits(state.matrix.allowed[j][cls]))
+        for j in range(len(problem.locations)) for cls in (0, 1)
+    }
+
+    start_cost = best_cost = state.cost
+    best_grid = [row[:] for row in grid]
+    iterations = accepted = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    temperature = T_START
+
+    while cells:
+        if max_iterations is not None:
+            if iterations >= max_iterations:
+                break
+            progress = iterations / max_iterations
+        else:
+            if iterations & 255 == 0:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                progress = (now - started) / seconds if seconds > 0 else 1.0
+        if iterations & 255 == 0:
+            temperature = T_START * (T_END / T_START) ** progress
+        iterations += 1
+
+        d, j = rng.choice(cells)
+        cur = grid[d][j]
+        # план хода: последовательность (place?, i, d, j)
+        if cur is None:
+            pool = candidates[(j, state.cls_of[d])]
+            if not pool:
+                continue
+            plan = [(True, rng.choice(pool), d, j)]
+        elif rng.random() < 0.5:
+            i_old = emp_index[cur]
+            pool = candidates[(j, state.cls_of[d])]
+            if not pool:
+                continue
+            i_new = rng.choice(pool)
+            if i_new == i_old:
+                continue
+            j2 = state.where.get((i_new, d))
+            if j2 is None:
+                plan = [(False, i_old, d, j), (True, i_new, d, j)]
+            else:
+                if (d, j2) in frozen:
+                    continue
+                plan = [(False, i_old, d, j), (False, i_new, d, j2), (True, i_new, d, j), (True, i_old, d, j2)]
+        else:
+            d2, j2 = rng.choice(cells)
+            cur2 = grid[d2][j2]
+            if cur2 is None or d2 == d or cur2 == cur:
+                continue
+            i1, i2 = emp_index[cur], emp_index[cur2]
+            plan = [(False, i1, d, j), (False, i2, d2, j2), (True, i2, d, j), (True, i1, d2, j2)]
+
+        done = []
+        delta = 0
+        ok = True
+        for is_place, i, pd, pj in plan:
+            if is_place:
+                if not state.can_place(i, pd, pj):
+                    ok = False
+                    break
+                delta += state.place(i, pd, pj)
+            else:
+                delta += state.unplace(i, pd, pj)
+            done.append((is_place, i, pd, pj))
+
+        if ok and (delta <= 0 or rng.random() < math.exp(-delta / temperature)):
+            accepted += 1
+            if state.cost < best_cost:
+                best_cost = state.cost
+                best_grid = [row[:] for row in grid]
+            continue
+
+        for is_place, i, pd, pj in reversed(done):
+            if is_place:
+                state.unplace(i, pd, pj)
+            else:
+                state.place(i, pd, pj)
+
+    if state.cost > best_cost:
+        for d, row in enumerate(best_grid):
+            grid[d][:] = row
+
+    return {
+        "iterations": iterations,
+        "accepted": accepted,
+        "start_cost": start_cost,
+        "end_cost": best_cost,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
@@ -0,0 +1,239 @@
+import random
+from collections import defaultdict
+from typing import List, Optional, Sequence
+
+from app.scheduler.eligibility import compile_rules, day_class, iter_bits
+from app.scheduler.generator import cell_penalty, streak_mask
+from app.scheduler.problem import ScheduleProblem, ScheduleSolution
+from app.scheduler.state import HARD_STREAK_CAP, HARD_WEEK_CAP, SOFT_STREAK_TARGET, SOFT_WEEK_TARGET
+from app.scheduler.stats import GenerationStats
+
+# Стоимость недопустимой пары: заведомо больше суммы любых мягких штрафов дня
+FORBIDDEN = 10 ** 9
+# Замена мягкого фильтра жадного солвера (w < SOFT_WEEK_TARGET и серия < SOFT_STREAK_TARGET)
+SOFT_MISS_PENALTY = 500
+# Замена «обязательных» выходных назначений (employee_rules) жадного солвера
+SPECIAL_BONUS = 1000
+
+
+def min_cost_assignment(cost: Sequence[Sequence[float]]) -> List[Optional[int]]:
+    """
+    Венгерский алгоритм с потенциалами для прямоугольной матрицы.
+    Возвращает для каждой строки индекс столбца (или None, если строк больше столбцов
+    и строке не хватило). Сложность O(n^2 * m), n = min(строк, столбцов).
+    """
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    if n == 0 or m == 0:
+        return [None] * n
+    if n > m:
+        transposed = [[cost[i][j] for i in range(n)] for j in range(m)]
+        res: List[Optional[int]] = [None] * n
+        for j, i in enumerate(min_cost_assignment(transposed)):
+            if i is not None:
+                res[i] = j
+        return res
+
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+
+    res = [None] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            res[p[j] - 1] = j - 1
+    return res
+
+
+def solve_matching(problem: ScheduleProblem, rng=None, stats: Optional[GenerationStats] = None) -> ScheduleSolution:
+    """
+    Каждый день решается как задача о назначениях локации × сотрудники
+    с теми же штрафами, что и в жадном солвере. Конфликт пары в зоне
+    не выражается в двудольном графе, поэтому снимается перерешиванием
+    с запретом более дорогой из конфликтующих пар.
+    """
+    rng = rng if rng is not None else random
+    start = problem.start
+    employees = problem.employees
+    locations = problem.locations
+    settings_map = problem.settings_map
+
+    solution = ScheduleSolution.empty(problem)
+    dates = solution.dates
+    day_pos = {d: i for i, d in enumerate(dates)}
+
+    matrix = compile_rules(problem)
+
+    week_count = defaultdict(int)
+    total_2w = defaultdict(int, problem.prior_totals)
+    prev_streak = defaultdict(int, problem.prior_streak)
+    used_loc_week = defaultdict(set)
+    # маски сотрудников, уже отработавших обязательное выходное назначение в неделе
+    target_done = defaultdict(int)
+    master_done = defaultdict(int)
+
+    week_capped_mask = defaultdict(int)
+    streak_capped_mask = streak_mask(matrix, prev_streak)
+
+    candidates_evaluated = empty_cells = special_overrides = 0
+    pool_sizes = defaultdict(int)
+
+    for wstart in range(0, len(dates), 7):
+        week_dates = dates[wstart:wstart + 7]
+        sorted_week_dates = sorted(week_dates, key=lambda d: 0 if d.weekday() in (5, 6) else 1)
+
+        for day in sorted_week_dates:
+            week_idx = (day - start).days // 7
+            weekday = day.weekday()
+            cls = day_class(weekday)
+            is_weekend = weekday in (5, 6)
+            blocked = streak_capped_mask | week_capped_mask[week_idx] | matrix.away[day_pos[day]]
+
+            cand = {}
+            open_count = 0
+            for j, loc in enumerate(locations):
+                if matrix.closed_weekdays[j] and not is_weekend:
+                    continue
+                open_count += 1
+                mask = matrix.allowed[j][cls] & ~blocked
+                size = mask.bit_count()
+                candidates_evaluated += size
+                pool_sizes[size] += 1
+                if mask:
+                    cand[j] = mask
+            if not cand:
+                empty_cells += open_count
+                prev_streak = defaultdict(int)
+                streak_capped_mask = 0
+                continue
+
+            rows = list(cand)
+            union = 0
+            for mask in cand.values():
+                union |= mask
+            cols = list(iter_bits(union))
+
+            def special_kind(j: int, i: int) -> Optional[str]:
+                if not is_weekend:
+                    return None
+                bit = 1 << i
+                if matrix.master_loc[j] and matrix.need_master & ~master_done[week_idx] & bit:
+                    return "master"
+                if matrix.target_loc[j] and matrix.need_target & ~target_done[week_idx] & bit:
+                    return "target"
+                return None
+
+            cost = []
+            for j in rows:
+                loc = locations[j]
+                mask = cand[j]
+                row = []
+                for i in cols:
+                    if not (mask >> i) & 1:
+                        row.append(FORBIDDEN)
+                        continue
+                    emp = employees[i]
+                    w = week_count[(emp.id, week_idx)]
+                    s_now = prev_streak[emp.id]
+                    pen = cell_penalty(settings_map.get((emp.id, loc.id)), w, s_now,
+                                       loc.id in used_loc_week[(emp.id, week_idx)],
+                                       total_2w[emp.id])
+                    if w >= SOFT_WEEK_TARGET or s_now >= SOFT_STREAK_TARGET:
+                        pen += SOFT_MISS_PENALTY
+                    if special_kind(j, i):
+                        pen -= SPECIAL_BONUS
+                    row.append(pen + rng.random())  # случайный разрыв ничьих
+                cost.append(row)
+
+            while True:
+                picked = min_cost_assignment(cost)
+                chosen = {r: picked[r] for r in range(len(rows))
+                          if picked[r] is not None and cost[r][picked[r]] < FORBIDDEN}
+
+                # снимаем конфликт пары: запрещаем более дорогую из двух ячеек в зоне
+                zone_mask = defaultdict(int)
+                for r, c in chosen.items():
+                    zone_mask[locations[rows[r]].zone] |= 1 << cols[c]
+                clash = None
+                for r, c in chosen.items():
+                    i = cols[c]
+                    if matrix.conflict[i] & zone_mask[locations[rows[r]].zone]:
+                        if clash is None or cost[r][c] > cost[clash[0]][clash[1]]:
+                            clash = (r, c)
+                if clash is None:
+                    break
+                cost[clash[0]][clash[1]] = FORBIDDEN
+
+            empty_cells += open_count - len(chosen)
+            assigned_today_ids = set()
+            for r, c in chosen.items():
+                loc = locations[rows[r]]
+                emp = employees[cols[c]]
+                kind = special_kind(rows[r], cols[c])
+                if kind == "master":
+                    master_done[week_idx] |= 1 << cols[c]
+                elif kind == "target":
+                    target_done[week_idx] |= 1 << cols[c]
+                if kind:
+                    special_overrides += 1
+                solution.grid[day_pos[day]][rows[r]] = emp.id
+                assigned_today_ids.add(emp.id)
+                week_count[(emp.id, week_idx)] += 1
+                if week_count[(emp.id, week_idx)] >= HARD_WEEK_CAP:
+                    week_capped_mask[week_idx] |= 1 << cols[c]
+                total_2w[emp.id] += 1
+                used_loc_week[(emp.id, week_idx)].add(loc.id)
+
+            new_streak = defaultdict(int)
+            streak_capped_mask = 0
+            for i, e in enumerate(employees):
+                new_streak[e.id] = (prev_streak[e.id] + 1) if (e.id in assigned_today_ids) else 0
+                if new_streak[e.id] >= HARD_STREAK_CAP:
+                    streak_capped_mask |= 1 << i
+            prev_streak = new_streak
+
+    if stats is not None:
+        stats.candidates_evaluated += candidates_evaluated
+        stats.empty_cells += empty_cells
+        stats.special_overrides += special_overrides
+        for size, n in pool_sizes.items():
+            stats.pool_sizes[size] = stats.pool_sizes.get(size, 0) + n
+    return solution
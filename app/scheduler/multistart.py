@@ -0,0 +1,48 @@
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from app.scheduler.generator import SOLVER_GREEDY, run_pipeline
+from app.scheduler.improve import schedule_cost
+from app.scheduler.problem import ScheduleProblem, ScheduleSolution
+
+logger = logging.getLogger("scheduler")
+
+
+def run_seeds(count: int, seed: Optional[int] = None) -> List[int]:
+    """Сиды отдельных прогонов; по одному базовому seed список всегда один и тот же."""
+    base = random.Random(seed) if seed is not None else random.SystemRandom()
+    return [base.getrandbits(32) for _ in range(count)]
+
+
+def _run_one(args) -> Tuple[int, int, ScheduleSolution]:
+    problem, seed, solver, improve_seconds = args
+    solution = run_pipeline(problem, solver=solver, improve_seconds=improve_seconds, seed=seed)
+    return schedule_cost(problem, solution), seed, solution
+
+
+def solve_multistart(problem: ScheduleProblem, starts: int, seed: Optional[int] = None,
+                     solver: str = SOLVER_GREEDY, improve_seconds: float = 0.0,
+                     max_workers: Optional[int] = None) -> ScheduleSolution:
+    """
+    starts независимых прогонов run_pipeline в пуле процессов (по умолчанию — на всех ядрах).
+    Возвращает сетку с минимальной schedule_cost; её solution.seed повторяет прогон:
+    run_pipeline(problem, solver=..., seed=solution.seed).
+    """
+    seeds = run_seeds(starts, seed)
+    jobs = [(problem, s, solver, improve_seconds) for s in seeds]
+    workers = min(max_workers or os.cpu_count() or 1, starts)
+
+    if workers <= 1:
+        results = [_run_one(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_one, jobs))
+
+    # при равной стоимости побеждает более ранний сид — результат не зависит от порядка завершения
+    best_cost, best_seed, best = min(results, key=lambda r: r[0])
+    logger.info("multistart: starts=%d workers=%d best_seed=%s best_cost=%s costs=%s",
+                starts, workers, best_seed, best_cost, sorted(r[0] for r in results))
+    return best
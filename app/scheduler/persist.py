@@ -0,0 +1,61 @@
+from datetime import date
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.models import Shift
+from app.scheduler.problem import ScheduleSolution
+from app.scheduler.stats import GenerationStats, maybe_timer
+
+
+def insert_shifts(session: Session, rows: Iterable[dict]) -> int:
+    """
+    Пакетная вставка смен одним executemany (core insert, без unit of work).
+    rows — словари с ключами date, location_id, employee_id, status.
+    """
+    rows = list(rows)
+    if rows:
+        session.execute(insert(Shift), rows)
+    return len(rows)
+
+
+def delete_window_statement(start: date, end: date, statuses: Sequence[str]):
+    return delete(Shift).where(
+        Shift.date >= start,
+        Shift.date <= end,
+        Shift.status.in_(list(statuses)),
+    )
+
+
+def delete_window(session: Session, start: date, end: date, statuses: Sequence[str]) -> None:
+    session.execute(delete_window_statement(start, end, statuses))
+
+
+def replace_window(session: Session, start: date, end: date, statuses: Sequence[str], rows: Iterable[dict],
+                   stats: Optional[GenerationStats] = None) -> int:
+    """
+    Удаляет смены со статусами statuses в окне [start, end] и вставляет rows.
+    Всё в транзакции вызывающего: до commit окно не видно наполовину переписанным.
+    """
+    with maybe_timer(stats, "delete_drafts"):
+        delete_window(session, start, end, statuses)
+    with maybe_timer(stats, "insert"):
+        return insert_shifts(session, rows)
+
+
+def solution_rows(solution: ScheduleSolution, status: str = Shift.STATUS_DRAFT) -> List[dict]:
+    return [
+        {"date": d, "location_id": loc_id, "employee_id": emp_id, "status": status}
+        for d, loc_id, emp_id in solution.assignments()
+    ]
+
+
+def persist_solution(session: Session, solution: ScheduleSolution, status: str = Shift.STATUS_DRAFT,
+                     stats: Optional[GenerationStats] = None) -> int:
+    """
+    Записывает сетку в shifts: заменяет смены со статусом status в окне.
+    Коммит — на стороне вызывающего.
+    """
+    return replace_window(session, solution.dates[0], solution.dates[-1], [status],
+                          solution_rows(solution, status), stats=stats)
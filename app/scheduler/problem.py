@@ -0,0 +1,107 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+
+# Снимки строк БД: только нужные солверу поля, без ORM и identity map
+
+@dataclass(frozen=True, slots=True)
+class EmployeeRow:
+    id: int
+    full_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class LocationRow:
+    id: int
+    name: str
+    order: int
+    zone: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class SettingRow:
+    employee_id: int
+    location_id: int
+    is_allowed: bool
+    is_preferred: bool
+
+
+@dataclass(frozen=True, slots=True)
+class RuleSet:
+    """
+    Правила генератора из таблиц location_rules, employee_rules,
+    employee_weekend_bans и employee_conflicts — только id, без имён.
+    В битовые маски компилируется в build_eligibility.
+    """
+
+    weekend_only_locations: FrozenSet[int] = frozenset()
+    target_locations: FrozenSet[int] = frozenset()
+    master_locations: FrozenSet[int] = frozenset()
+    need_target: FrozenSet[int] = frozenset()   # employee_id
+    need_master: FrozenSet[int] = frozenset()
+    weekend_bans: FrozenSet[Tuple[int, int]] = frozenset()  # (employee_id, location_id)
+    conflicts: FrozenSet[Tuple[int, int]] = frozenset()     # (employee_id, other_id)
+
+
+@dataclass(slots=True)
+class ScheduleProblem:
+    """Всё, что нужно солверу: окно дат, сотрудники, локации и их настройки."""
+
+    start: date
+    weeks: int
+    employees: Tuple[EmployeeRow, ...]
+    locations: Tuple[LocationRow, ...]
+    settings_map: Dict[Tuple[int, int], SettingRow]
+    weekend_only_emp: Dict[int, bool]
+    rules: RuleSet = field(default_factory=RuleSet)
+    # (employee_id, первый, последний день) периодов недоступности, пересекающих окно
+    unavailability: Tuple[Tuple[int, date, date], ...] = ()
+    # Состояние на момент start от предыдущих недель (потоковая генерация):
+    # серия дней подряд, закончившаяся накануне start, и накопленное число смен
+    prior_streak: Dict[int, int] = field(default_factory=dict)
+    prior_totals: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def dates(self) -> List[date]:
+        return [self.start + timedelta(days=i) for i in range(self.weeks * 7)]
+
+    def is_open(self, loc: LocationRow, day: date) -> bool:
+        """Работает ли локация в этот день (weekend-only закрыты в будни)."""
+        return day.weekday() in (5, 6) or loc.id not in self.rules.weekend_only_locations
+
+
+@dataclass(slots=True)
+class ScheduleSolution:
+    """
+    Сетка назначений: grid[day_idx][loc_idx] -> employee_id или None.
+    Индексы дней — по problem.dates, локаций — по problem.locations.
+    """
+
+    start: date
+    dates: List[date]
+    location_ids: List[int]
+    grid: List[List[Optional[int]]] = field(default_factory=list)
+    seed: Optional[int] = None  # сид прогона, если задан — для точного повтора
+    stats: Optional[object] = None  # GenerationStats прогона
+
+    @classmethod
+    def empty(cls, problem: ScheduleProblem) -> "ScheduleSolution":
+        dates = problem.dates
+        location_ids = [l.id for l in problem.locations]
+        return cls(
+            start=problem.start,
+            dates=dates,
+            location_ids=location_ids,
+            grid=[[None] * len(location_ids) for _ in dates],
+        )
+
+    def assignments(self) -> Iterator[Tuple[date, int, int]]:
+        """(date, location_id, employee_id) для всех заполненных ячеек."""
+        for d, row in zip(self.dates, self.grid):
+            for loc_id, emp_id in zip(self.location_ids, row):
+                if emp_id is not None:
+                    yield d, loc_id, emp_id
+
+    def filled(self) -> int:
+        return sum(1 for row in self.grid for emp_id in row if emp_id is not None)
@@ -0,0 +1,93 @@
+import logging
+from datetime import date, timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.models import Shift
+from app.schedule_cache import bump_schedule_version
+from app.scheduler.eligibility import iter_bits
+from app.scheduler.generator import load_problem
+from app.scheduler.history import refresh_week_load
+from app.scheduler.problem import ScheduleSolution
+from app.scheduler.state import ScheduleState
+
+logger = logging.getLogger("scheduler")
+
+
+def repair_schedule(
+    session: Session,
+    employee_id: int,
+    start: Optional[date] = None,
+    statuses: Sequence[str] = (Shift.STATUS_DRAFT, Shift.STATUS_PUBLISHED),
+) -> int:
+    """
+    Точечный ремонт графика, когда сотрудник стал недоступен (больничный, удаление).
+    Освобождает только его ячейки начиная с start (по умолчанию сегодня)
+    и заново заполняет их лучшим допустимым кандидатом при текущем состоянии сетки.
+    Остальные строки, в том числе уже пустые ячейки, не трогаются. Все изменения — одним пакетным UPDATE;
+    коммит на стороне вызывающего. Возвращает число переписанных смен.
+    """
+    today = start or date.today()
+    first = today - timedelta(days=today.weekday())
+    last = session.query(func.max(Shift.date)).filter(
+        Shift.status.in_(list(statuses)),
+        Shift.date >= today,
+    ).scalar()
+    if last is None:
+        return 0
+
+    weeks = (last - first).days // 7 + 1
+    problem = load_problem(session, first, weeks)
+    problem.employees = tuple(e for e in problem.employees if e.id != employee_id)
+
+    rows = session.query(Shift.id, Shift.date, Shift.location_id, Shift.employee_id, Shift.status).filter(
+        Shift.status.in_(list(statuses)),
+        Shift.date >= first,
+        Shift.date <= last,
+    ).all()
+
+    loc_pos = {l.id: j for j, l in enumerate(problem.locations)}
+    updates = []
+    for status in statuses:
+        solution = ScheduleSolution.empty(problem)
+        day_pos = {d: i for i, d in enumerate(solution.dates)}
+        shift_ids = {}
+        freed = []
+        for shift_id, d, loc_id, emp_id, st in rows:
+            if st != status or loc_id not in loc_pos:
+                continue
+            cell = (day_pos[d], loc_pos[loc_id])
+            shift_ids[cell] = shift_id
+            if d >= today and emp_id == employee_id:
+                freed.append(cell)
+            else:
+                solution.grid[cell[0]][cell[1]] = emp_id
+        if not freed:
+            continue
+
+        state = ScheduleState(problem, solution)
+        for d, j in sorted(freed):
+            best = None
+            for i in iter_bits(state.matrix.allowed[j][state.cls_of[d]]):
+                if not state.can_place(i, d, j):
+                    continue
+                delta = state.place(i, d, j)
+                state.unplace(i, d, j)
+                if best is None or delta < best[0]:
+                    best = (delta, i)
+            new_emp = None
+            if best is not None:
+                state.place(best[1], d, j)
+                new_emp = state.employees[best[1]].id
+            updates.append({"id": shift_ids[(d, j)], "employee_id": new_emp})
+
+    if updates:
+        session.execute(update(Shift), updates)
+        refresh_week_load(session, today, last)
+        bump_schedule_version(session)
+    logger.info("repair_schedule: employee=%s from=%s cells=%d unfilled=%d",
+                employee_id, today.isoformat(), len(updates),
+                sum(1 for u in updates if u["employee_id"] is None))
+    return len(updates)
@@ -0,0 +1,67 @@
+"""
+Реестр солверов.
+
+Солвер — функция (problem, rng=None, stats=None) -> ScheduleSolution: по снимку
+ScheduleProblem строит сетку, не трогая БД, и складывает счётчики в stats
+(GenerationStats или None). Встроенные: "greedy" и "matching". Дополнительные
+движки регистрируются через register() или переменную окружения
+
+    SCHEDULER_SOLVERS="name=package.module:function,other=pkg.mod:fn"
+
+Движок по умолчанию — SCHEDULER_SOLVER (иначе "greedy"); запрос может выбрать
+другой явно (generate_schedule(solver=...), POST /api/schedule/jobs).
+Сравнение движков на одинаковых данных: python -m app.scheduler.bench --compare.
+"""
+import importlib
+import os
+from typing import Callable, Dict, List
+
+from app.scheduler.generator import SOLVER_GREEDY, SOLVER_MATCHING, solve_greedy
+from app.scheduler.matching import solve_matching
+from app.scheduler.problem import ScheduleSolution
+
+Solver = Callable[..., ScheduleSolution]
+
+_REGISTRY: Dict[str, Solver] = {}
+_plugins_loaded = False
+
+
+def register(name: str, solver: Solver) -> Solver:
+    _REGISTRY[name] = solver
+    return solver
+
+
+def _load_plugins() -> None:
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for item in os.environ.get("SCHEDULER_SOLVERS", "").split(","):
+        if not item.strip():
+            continue
+        name, _, target = item.strip().partition("=")
+        module, _, attr = target.partition(":")
+        register(name.strip(), getattr(importlib.import_module(module.strip()), attr.strip()))
+
+
+def available() -> List[str]:
+    _load_plugins()
+    return sorted(_REGISTRY)
+
+
+def get_solver(name: str) -> Solver:
+    _load_plugins()
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown solver: {name}") from None
+
+
+def default_solver() -> str:
+    name = os.environ.get("SCHEDULER_SOLVER", SOLVER_GREEDY)
+    get_solver(name)  # опечатка в конфиге должна падать сразу, а не на середине генерации
+    return name
+
+
+register(SOLVER_GREEDY, solve_greedy)
+register(SOLVER_MATCHING, solve_matching)
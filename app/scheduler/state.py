@@ -0,0 +1,198 @@
+"""
+Инкрементальная модель сетки, общая для генератора, улучшения, ремонта и декомпозиции:
+жёсткие лимиты, веса целевой функции, ScheduleState (can_place / place / unplace)
+и ячейки, которые перестановки не трогают.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.scheduler.eligibility import EligibilityMatrix, compile_rules, day_class
+from app.scheduler.problem import ScheduleProblem, ScheduleSolution
+
+SOFT_WEEK_TARGET = 4
+HARD_WEEK_CAP = 5
+SOFT_STREAK_TARGET = 2
+HARD_STREAK_CAP = 3
+
+# Веса мягких ограничений — те же, что в cell_penalty, но в виде целевой функции всей сетки
+PREFERRED_BONUS = 40
+REPEAT_LOC_PENALTY = 300
+EMPTY_CELL_PENALTY = 1000
+
+
+def _cumulative(step, n: int) -> List[int]:
+    acc = [0]
+    for k in range(n):
+        acc.append(acc[-1] + step(k))
+    return acc
+
+
+def _load_step(k: int) -> int:
+    # k-я смена за неделю: награда ниже SOFT_WEEK_TARGET, растущий штраф выше
+    if k < SOFT_WEEK_TARGET:
+        return -(SOFT_WEEK_TARGET - k) * 25
+    return (k - SOFT_WEEK_TARGET + 1) * 30
+
+
+def _streak_step(k: int) -> int:
+    # k — сколько дней подряд уже отработано перед этой сменой
+    if k >= SOFT_STREAK_TARGET:
+        return (k - SOFT_STREAK_TARGET + 1) * 35
+    return 0
+
+
+class ScheduleState:
+    """
+    Инкрементальная оценка сетки. Стоимость раскладывается по
+    (сотрудник, неделя), сериям дней подряд и (сотрудник, неделя, локация),
+    поэтому place/unplace пересчитывают только затронутые слагаемые.
+    """
+
+    def __init__(self, problem: ScheduleProblem, solution: ScheduleSolution,
+                 matrix: Optional[EligibilityMatrix] = None):
+        self.matrix = matrix or compile_rules(problem)
+        self.solution = solution
+        self.grid = solution.grid
+        self.employees = self.matrix.employees
+        n_days = len(solution.dates)
+        self.week_of = [d // 7 for d in range(n_days)]
+        self.cls_of = [day_class(d.weekday()) for d in solution.dates]
+        self.zone_of = [loc.zone for loc in problem.locations]
+
+        self.load_cost = _cumulative(_load_step, n_days + 1)
+        self.streak_cost = _cumulative(_streak_step, n_days + 1)
+
+        self.load: Dict[Tuple[int, int], int] = defaultdict(int)
+        # накопленная нагрузка прошлых окон — тот же приор, что у солверов
+        self.total = [problem.prior_totals.get(e.id, 0) for e in self.employees]
+        # серия, с которой сотрудник входит в окно (потоковая генерация)
+        self.prior_streak = [problem.prior_streak.get(e.id, 0) for e in self.employees]
+        self.days = [0] * len(self.employees)
+        self.where: Dict[Tuple[int, int], int] = {}
+        self.loc_week: Dict[Tuple[int, int, int], int] = defaultdict(int)
+        self.day_zone: Dict[Tuple[int, Optional[str]], int] = defaultdict(int)
+
+        self.open_cells: List[Tuple[int, int]] = [
+            (d, j)
+            for d, day in enumerate(solution.dates)
+            for j in range(len(problem.locations))
+            if not (self.matrix.closed_weekdays[j] and day.weekday() not in (5, 6))
+        ]
+        self.cost = EMPTY_CELL_PENALTY * len(self.open_cells)
+
+        for d, row in enumerate(self.grid):
+            for j, emp_id in enumerate(row):
+                if emp_id is None:
+                    continue
+                i = self.matrix.emp_index.get(emp_id)
+                if i is None:
+                    continue
+                row[j] = None
+                self.place(i, d, j)
+
+    def _run(self, i: int, d: int, step: int) -> int:
+        mask = self.days[i]
+        n = 0
+        d += step
+        while 0 <= d < len(self.week_of) and (mask >> d) & 1:
+            n += 1
+            d += step
+        return n
+
+    def can_place(self, i: int, d: int, j: int) -> bool:
+        if self.grid[d][j] is not None:
+            return False
+        if not (self.matrix.allowed[j][self.cls_of[d]] >> i) & 1:
+            return False
+        if (self.days[i] >> d) & 1:
+            return False
+        if (self.matrix.away[d] >> i) & 1:
+            return False
+        if self.load[(i, self.week_of[d])] >= HARD_WEEK_CAP:
+            return False
+        before = self._run(i, d, -1)
+        if before == d:  # серия тянется от первого дня окна
+            before += self.prior_streak[i]
+        if before + 1 + self._run(i, d, 1) > HARD_STREAK_CAP:
+            return False
+        if self.matrix.conflict[i] & self.day_zone[(d, self.zone_of[j])]:
+            return False
+        return True
+
+    def place(self, i: int, d: int, j: int) -> int:
+        w = self.week_of[d]
+        lw = self.load[(i, w)]
+        delta = self.load_cost[lw + 1] - self.load_cost[lw]
+        self.load[(i, w)] = lw + 1
+
+        delta += self.total[i]  # сумма total по ходу = T*(T-1)/2
+        self.total[i] += 1
+
+        a, b = self._run(i, d, -1), self._run(i, d, 1)
+        delta += self.streak_cost[a + 1 + b] - self.streak_cost[a] - self.streak_cost[b]
+        self.days[i] |= 1 << d
+        self.where[(i, d)] = j
+
+        c = self.loc_week[(i, w, j)]
+        if c:
+            delta += REPEAT_LOC_PENALTY
+        self.loc_week[(i, w, j)] = c + 1
+
+        if (self.matrix.preferred[j][self.cls_of[d]] >> i) & 1:
+            delta -= PREFERRED_BONUS
+        delta -= EMPTY_CELL_PENALTY
+
+        self.day_zone[(d, self.zone_of[j])] |= 1 << i
+        self.grid[d][j] = self.employees[i].id
+        self.cost += delta
+        return delta
+
+    def unplace(self, i: int, d: int, j: int) -> int:
+        w = self.week_of[d]
+        lw = self.load[(i, w)]
+        delta = self.load_cost[lw - 1] - self.load_cost[lw]
+        self.load[(i, w)] = lw - 1
+
+        self.total[i] -= 1
+        delta -= self.total[i]
+
+        self.days[i] &= ~(1 << d)
+        del self.where[(i, d)]
+        a, b = self._run(i, d, -1), self._run(i, d, 1)
+        delta += self.streak_cost[a] + self.streak_cost[b] - self.streak_cost[a + 1 + b]
+
+        c = self.loc_week[(i, w, j)] - 1
+        if c:
+            delta -= REPEAT_LOC_PENALTY
+        self.loc_week[(i, w, j)] = c
+
+        if (self.matrix.preferred[j][self.cls_of[d]] >> i) & 1:
+            delta += PREFERRED_BONUS
+        delta += EMPTY_CELL_PENALTY
+
+        self.day_zone[(d, self.zone_of[j])] &= ~(1 << i)
+        self.grid[d][j] = None
+        self.cost += delta
+        return delta
+
+
+def frozen_cells(matrix: EligibilityMatrix, solution: ScheduleSolution) -> set:
+    # Не трогаем обязательные выходные назначения (employee_rules) на целевые локации
+    # и ячейки сотрудников, которых нет в снимке задачи
+    frozen = set()
+    for d, day in enumerate(solution.dates):
+        for j in range(len(matrix.locations)):
+            emp_id = solution.grid[d][j]
+            if emp_id is None:
+                continue
+            i = matrix.emp_index.get(emp_id)
+            if i is None:
+                frozen.add((d, j))
+                continue
+            if day.weekday() not in (5, 6):
+                continue
+            bit = 1 << i
+            if (matrix.master_loc[j] and matrix.need_master & bit) or \
+                    (matrix.target_loc[j] and matrix.need_target & bit):
+                frozen.add((d, j))
+    return frozen
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, List, Optional
+
+
+@dataclass
+class GenerationStats:
+    """Таймеры фаз и счётчики одного прогона генерации."""
+
+    start: Optional[str] = None
+    weeks: int = 0
+    solver: str = ""
+    seed: Optional[int] = None
+    phases: Dict[str, float] = field(default_factory=dict)
+    candidates_evaluated: int = 0
+    pool_sizes: Dict[int, int] = field(default_factory=dict)  # размер пула -> число ячеек
+    preferred_fallbacks: int = 0
+    empty_cells: int = 0
+    filled_cells: int = 0
+    special_overrides: int = 0
+    feasibility_deficit: int = 0  # ячейки, которые нельзя закрыть при текущих настройках
+    finished_at: Optional[float] = None
+
+    @contextmanager
+    def timer(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0.0) + time.perf_counter() - t, 6)
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["total_seconds"] = round(sum(self.phases.values()), 6)
+        return d
+
+
+@contextmanager
+def maybe_timer(stats: Optional[GenerationStats], name: str):
+    if stats is None:
+        yield
+    else:
+        with stats.timer(name):
+            yield
+
+
+# Последние прогоны в памяти процесса — для /admin/metrics/generator
+_RECENT: Deque[GenerationStats] = deque(maxlen=50)
+_TOTALS: Dict[str, float] = defaultdict(float)
+_LOCK = threading.Lock()
+
+
+def record(stats: GenerationStats) -> None:
+    stats.finished_at = time.time()
+    with _LOCK:
+        _RECENT.append(stats)
+        _TOTALS["runs"] += 1
+        _TOTALS["candidates_evaluated"] += stats.candidates_evaluated
+        _TOTALS["preferred_fallbacks"] += stats.preferred_fallbacks
+        _TOTALS["empty_cells"] += stats.empty_cells
+        _TOTALS["special_overrides"] += stats.special_overrides
+        for name, seconds in stats.phases.items():
+            _TOTALS[f"seconds_{name}"] += seconds
+
+
+def snapshot() -> dict:
+    with _LOCK:
+        recent: List[dict] = [s.as_dict() for s in _RECENT]
+        totals = dict(_TOTALS)
+    return {"totals": totals, "recent": recent}
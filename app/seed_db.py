@@ -1,12 +1,14 @@
 from app.seed_locations import seed_locations
 from app.seed_employees import seed_employees
 from app.seed_employee_settings import seed_employee_settings
+from app.seed_rules import seed_rules
 
 
 def seed_all():
     seed_locations()
     seed_employees()
     seed_employee_settings()
+    seed_rules()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+import os
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal
+from app.models import ConflictPair, Employee, EmployeeRule, Location, LocationRule, MaintenanceRun, WeekendBan
+from app.seed_employee_settings import norm_name
+
+# Исходные правила генератора (раньше — константы в app/scheduler/generator.py).
+# Переводятся в id один раз за жизнь базы (маркер SEED_MARKER в maintenance_runs);
+# дальше правила живут в БД и правятся через /admin/rules без деплоя —
+# очищенные админом таблицы после рестарта остаются пустыми.
+SEED_MARKER = ("seed_rules", "initial")
+WEEKEND_ONLY_LOCATIONS = {"Луномосик", "Авиапарк", "Москвариум 3"}
+SPECIAL_TARGET_LOCATIONS = {"Москвариум 1", "Москвариум 0", "Мультпарк"}
+MASTER_CLASS_LOCATIONS = {"Мастер классы"}
+
+EMPLOYEE_RULES = {
+    "Катя Стрижкина": {"need_target_once": True,  "need_master_once": False},
+    "Настя Губарева": {"need_target_once": True,  "need_master_once": False},
+    "Лиза Терехова":  {"need_target_once": True,  "need_master_once": False},
+    "Аня Стаценко":   {"need_target_once": True,  "need_master_once": True},
+}
+WEEKEND_BANS = {
+    "Алиса Бойцова": {"Москвариум 0", "Москвариум 1"},
+}
+CONFLICT_PAIRS = [
+    ("Катя Стрижкина", "Аня Стаценко"),
+]
+
+
+def seed_rules():
+    db = SessionLocal()
+    try:
+        task, period = SEED_MARKER
+        if db.query(MaintenanceRun.task).filter(
+            MaintenanceRun.task == task, MaintenanceRun.period == period,
+        ).first():
+            print("[SEED_RULES] skip: already seeded")
+            return
+        # маркер — в той же транзакции, что и правила: второй воркер упрётся в первичный ключ
+        db.execute(insert(MaintenanceRun).values(
+            task=task, period=period, worker_pid=os.getpid(), ran_at=datetime.utcnow(),
+        ))
+
+        has_rules = any(
+            db.query(model).first() is not None
+            for model in (LocationRule, EmployeeRule, WeekendBan, ConflictPair)
+        )
+        if has_rules:
+            # база заполнена до появления маркера — только отмечаем
+            db.commit()
+            print("[SEED_RULES] skip: rules already in DB")
+            return
+
+        emp_id = {norm_name(name): i for i, name in db.query(Employee.id, Employee.full_name)}
+        loc_id = {name: i for i, name in db.query(Location.id, Location.name)}
+
+        for name, i in loc_id.items():
+            flags = {
+                "weekend_only": name in WEEKEND_ONLY_LOCATIONS,
+                "special_target": name in SPECIAL_TARGET_LOCATIONS,
+                "master_class": name in MASTER_CLASS_LOCATIONS,
+            }
+            if any(flags.values()):
+                db.add(LocationRule(location_id=i, **flags))
+
+        for name, flags in EMPLOYEE_RULES.items():
+            i = emp_id.get(norm_name(name))
+            if i is not None:
+                db.add(EmployeeRule(employee_id=i, **flags))
+
+        for name, loc_names in WEEKEND_BANS.items():
+            i = emp_id.get(norm_name(name))
+            if i is None:
+                continue
+            for loc_name in loc_names:
+                if loc_name in loc_id:
+                    db.add(WeekendBan(employee_id=i, location_id=loc_id[loc_name]))
+
+        for a, b in CONFLICT_PAIRS:
+            ia, ib = emp_id.get(norm_name(a)), emp_id.get(norm_name(b))
+            if ia is not None and ib is not None:
+                db.add(ConflictPair(employee_id=min(ia, ib), other_id=max(ia, ib)))
+
+        db.commit()
+        print("[SEED_RULES] OK: generator rules filled")
+    except IntegrityError:
+        db.rollback()
+        print("[SEED_RULES] skip: seeded by another worker")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    seed_rules()
@@ -8,9 +8,12 @@ from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
 
 from app.run_migrations import run_migrations
-from app.database import init_db
+from app.database import SessionLocal, init_db
+from app.jobs import fail_stale_jobs
+from app.maintenance import scheduler as maintenance_scheduler
+from app.scheduler.history import backfill_week_load
 from app.seed_db import seed_all
-from app.routes import admin, public, schedule, auth, employees, archive, ui_employees  # 🔹 добавили ui_employees
+from app.routes import admin, public, schedule, auth, employees, archive, ui_employees, metrics, jobs, rules, unavailability, feasibility  # 🔹 добавили ui_employees
 
 LOGLEVEL = os.environ.get("LOGLEVEL", "INFO").upper()
 logging.basicConfig(
@@ -49,8 +52,33 @@ def _startup():
     except Exception:
         logger.exception("Failed to seed data")
 
+    try:
+        db = SessionLocal()
+        try:
+            if backfill_week_load(db):
+                db.commit()
+        finally:
+            db.close()
+    except Exception:
+        logger.exception("Failed to backfill employee_week_load")
+
+    try:
+        stale = fail_stale_jobs()
+        if stale:
+            logger.info("Marked %d interrupted generation jobs as failed", stale)
+    except Exception:
+        logger.exception("Failed to clean up generation jobs")
+
+    # rollover недели и прочее обслуживание — фоном, а не на чтении /schedule
+    maintenance_scheduler.start()
+
     logger.info("Startup complete")
 
+
+@app.on_event("shutdown")
+def _shutdown():
+    maintenance_scheduler.stop()
+
 @app.get("/")
 def root():
     return RedirectResponse(url="/schedule", status_code=302)
@@ -63,3 +91,8 @@ app.include_router(auth.router)
 app.include_router(employees.router)
 app.include_router(archive.router)
 app.include_router(ui_employees.router)  # 🔹 теперь /ui/employees откроет employees.html
+app.include_router(metrics.router)
+app.include_router(jobs.router, prefix="/api")
+app.include_router(rules.router)
+app.include_router(unavailability.router)
+app.include_router(feasibility.router)
@@ -6,6 +6,7 @@ import sys
 
 # Добавим путь к приложению
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.database import SQLALCHEMY_DATABASE_URL
 from app.db_base import Base
 from app.models import *
 
@@ -15,8 +16,13 @@ fileConfig(config.config_file_name)
 
 target_metadata = Base.metadata
 
+
+def database_url():
+    # URL из конфигурации (run_migrations, тесты), иначе — тот же, что у приложения (DATABASE_URL или app/scheduler.db)
+    return config.get_main_option("sqlalchemy.url") or SQLALCHEMY_DATABASE_URL
+
 def run_migrations_offline():
-    url = os.getenv("DATABASE_URL")  # из переменной окружения
+    url = database_url()
     context.configure(
         url=url, target_metadata=target_metadata, literal_binds=True
     )
@@ -24,7 +30,7 @@ def run_migrations_offline():
         context.run_migrations()
 
 def run_migrations_online():
-    url = os.getenv("DATABASE_URL")
+    url = database_url()
     connectable = engine_from_config(
         {"sqlalchemy.url": url},
         prefix="sqlalchemy.",
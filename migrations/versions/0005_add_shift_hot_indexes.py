@@ -0,0 +1,37 @@
+"""add (status, date) and (employee_id, date) indexes on shifts"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0005_add_shift_hot_indexes"
+down_revision = "0004_add_status_to_unique_constraint"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_shifts_status_date": ["status", "date"],
+    "ix_shifts_employee_date": ["employee_id", "date"],
+}
+
+
+def upgrade():
+    conn = op.get_bind()
+    insp = sa.inspect(conn)
+
+    if "shifts" in insp.get_table_names():
+        existing = {ix["name"] for ix in insp.get_indexes("shifts")}
+        for name, columns in INDEXES.items():
+            if name not in existing:
+                op.create_index(name, "shifts", columns)
+
+
+def downgrade():
+    conn = op.get_bind()
+    insp = sa.inspect(conn)
+
+    if "shifts" in insp.get_table_names():
+        existing = {ix["name"] for ix in insp.get_indexes("shifts")}
+        for name in INDEXES:
+            if name in existing:
+                op.drop_index(name, table_name="shifts")
@@ -0,0 +1,32 @@
+"""add options to generation_jobs (single-flight key)"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0006_generation_job_options"
+down_revision = "0005_add_shift_hot_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    insp = sa.inspect(conn)
+
+    # Таблицу создаёт init_db; на базах, где её ещё нет, колонка появится вместе с ней
+    if "generation_jobs" in insp.get_table_names():
+        columns = {c["name"] for c in insp.get_columns("generation_jobs")}
+        if "options" not in columns:
+            op.add_column("generation_jobs", sa.Column("options", sa.Text(), nullable=False, server_default="{}"))
+
+
+def downgrade():
+    conn = op.get_bind()
+    insp = sa.inspect(conn)
+
+    if "generation_jobs" in insp.get_table_names():
+        columns = {c["name"] for c in insp.get_columns("generation_jobs")}
+        if "options" in columns:
+            with op.batch_alter_table("generation_jobs") as batch:
+                batch.drop_column("options")
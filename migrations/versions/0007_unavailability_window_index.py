@@ -0,0 +1,35 @@
+"""index employee_unavailability by (end_date, start_date, employee_id) for window lookups"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0007_unavailability_window_index"
+down_revision = "0006_generation_job_options"
+branch_labels = None
+depends_on = None
+
+TABLE = "employee_unavailability"
+OLD_INDEX = ("ix_unavailability_employee_dates", ["employee_id", "start_date", "end_date"])
+NEW_INDEX = ("ix_unavailability_window", ["end_date", "start_date", "employee_id"])
+
+
+def _swap(drop, create):
+    conn = op.get_bind()
+    insp = sa.inspect(conn)
+
+    # таблицу создаёт init_db(); в базе без неё менять нечего
+    if TABLE in insp.get_table_names():
+        existing = {ix["name"] for ix in insp.get_indexes(TABLE)}
+        if drop[0] in existing:
+            op.drop_index(drop[0], table_name=TABLE)
+        if create[0] not in existing:
+            op.create_index(create[0], TABLE, create[1])
+
+
+def upgrade():
+    _swap(OLD_INDEX, NEW_INDEX)
+
+
+def downgrade():
+    _swap(NEW_INDEX, OLD_INDEX)
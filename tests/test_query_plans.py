@@ -0,0 +1,81 @@
+"""
+Схема после run_migrations() и планы горячих запросов на ней — в том порядке,
+что и при старте приложения: миграции, затем init_db() (create_all).
+"""
+import os
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.database import make_engine
+from app.db_base import Base
+from app.models import Employee, EmployeeSetting
+from app.query_plan import HOT_QUERIES, table_steps, uses_index
+from app.run_migrations import run_migrations
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "migrations")
+
+
+def _head() -> str:
+    cfg = Config()
+    cfg.set_main_option("script_location", MIGRATIONS_DIR)
+    return ScriptDirectory.from_config(cfg).get_current_head()
+
+
+def _version(engine) -> str:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def _schema_diff(engine) -> list:
+    """Расхождения схемы базы с моделями; пустой список — база совпадает с Base.metadata."""
+    with engine.connect() as conn:
+        return compare_metadata(MigrationContext.configure(conn), Base.metadata)
+
+
+@pytest.fixture(scope="module")
+def migrated_engine(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('db') / 'scheduler.db'}"
+    run_migrations(url)
+    engine = make_engine(url)
+    Base.metadata.create_all(engine)  # как init_db() при старте после миграций
+    yield engine
+    engine.dispose()
+
+
+def test_fresh_database_matches_models(migrated_engine):
+    assert _version(migrated_engine) == _head()
+    assert _schema_diff(migrated_engine) == []
+    # то, на чём падал старт на устаревших таблицах из 0001
+    with Session(migrated_engine) as session:
+        session.execute(select(Employee.birth_date, Employee.on_sick_leave)).all()
+        session.execute(select(EmployeeSetting)).all()
+
+
+@pytest.mark.parametrize("query", HOT_QUERIES, ids=[q.name for q in HOT_QUERIES])
+def test_hot_query_uses_index(migrated_engine, query):
+    steps = table_steps(migrated_engine, query)
+    assert uses_index(steps, query.index), steps
+
+
+def test_create_all_database_is_stamped_and_upgraded(tmp_path):
+    # база, созданная init_db() без миграций и до индексов 0005/0007: 0001 на ней упала бы
+    url = f"sqlite:///{tmp_path / 'scheduler.db'}"
+    engine = make_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name in ("ix_shifts_status_date", "ix_shifts_employee_date", "ix_unavailability_window"):
+            conn.execute(text(f"DROP INDEX {name}"))
+    try:
+        run_migrations(url)
+        assert _version(engine) == _head()
+        assert _schema_diff(engine) == []
+        indexes = {ix["name"] for ix in inspect(engine).get_indexes("employee_unavailability")}
+        assert "ix_unavailability_window" in indexes
+    finally:
+        engine.dispose()